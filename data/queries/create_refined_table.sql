@@ -1,2 +0,0 @@
-CREATE OR REPLACE TABLE refined.data_{year} AS
-SELECT * FROM temp_table;
@@ -1,8 +1,7 @@
-CREATE OR REPLACE TABLE refined.students AS
-
 -- 2022 indicators → 2023 lag
 SELECT
     d22.ra_2022 AS ra,
+    2022 AS year,
     d22.gender_2022 AS gender,
     d22.education_institution_2022 AS education_institution,
     d22.age_22_2022 AS age,
@@ -17,15 +16,18 @@ SELECT
     d22.ipv_2022 AS ipv,
     d22.ian_2022 AS ian,
     d22.lag_2022 AS lag_current,
-    d23.lag_2023 AS lag_next
+    d23.lag_2023 AS lag_next,
+    t.* EXCLUDE (ra, year)
 FROM refined.data_2022 d22
 INNER JOIN refined.data_2023 d23 ON d22.ra_2022 = d23.ra_2023
+LEFT JOIN refined.student_trajectories t ON t.ra = d22.ra_2022 AND t.year = 2022
 
 UNION ALL
 
 -- 2023 indicators → 2024 lag
 SELECT
     d23.ra_2023 AS ra,
+    2023 AS year,
     d23.gender_2023 AS gender,
     d23.education_institution_2023 AS education_institution,
     d23.age_2023 AS age,
@@ -40,6 +42,8 @@ SELECT
     d23.ipv_2023 AS ipv,
     d23.ian_2023 AS ian,
     d23.lag_2023 AS lag_current,
-    d24.lag_2024 AS lag_next
+    d24.lag_2024 AS lag_next,
+    t.* EXCLUDE (ra, year)
 FROM refined.data_2023 d23
-INNER JOIN refined.data_2024 d24 ON d23.ra_2023 = d24.ra_2024;
+INNER JOIN refined.data_2024 d24 ON d23.ra_2023 = d24.ra_2024
+LEFT JOIN refined.student_trajectories t ON t.ra = d23.ra_2023 AND t.year = 2023;
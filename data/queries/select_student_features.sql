@@ -0,0 +1,6 @@
+SELECT
+    h.* EXCLUDE (lag),
+    t.* EXCLUDE (ra, year)
+FROM refined.student_history h
+LEFT JOIN refined.student_trajectories t ON t.ra = h.ra AND t.year = h.year
+ORDER BY h.ra, h.year;
@@ -0,0 +1,39 @@
+WITH stone_encoding (stone_name, stone_code) AS (
+    VALUES {stone_encoding}
+),
+
+history AS (
+    SELECT
+        h.ra,
+        h.year,
+        s.stone_code AS stone,
+        h.inde,
+        h.iaa,
+        h.ieg,
+        h.ips,
+        h.ida,
+        h.ipv,
+        h.ian
+    FROM refined.student_history h
+    LEFT JOIN stone_encoding s ON s.stone_name = h.stone
+),
+
+-- Windows see the full history; only years >= since_year are emitted
+trajectories AS (
+    SELECT
+        ra,
+        year,
+        count(*) OVER history_to_date AS years_observed,
+        {trajectory_select},
+        CASE WHEN {first_year} THEN 0 ELSE stone - lag(stone) OVER previous_years END AS stone_change
+    FROM history
+    WINDOW
+        previous_years AS (PARTITION BY ra ORDER BY year),
+        history_to_date AS (PARTITION BY ra ORDER BY year ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW),
+        rolling_window AS (PARTITION BY ra ORDER BY year ROWS BETWEEN {rolling_years} PRECEDING AND CURRENT ROW)
+)
+
+SELECT *
+FROM trajectories
+WHERE year >= {since_year}
+ORDER BY year, ra;
@@ -0,0 +1,127 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import duckdb
+from pandas import DataFrame
+
+
+class AsyncDuckDBClient:
+    """
+    Asyncio counterpart of DuckDBClient.
+
+    Queries run on a bounded thread pool, each on its own cursor (a separate
+    DuckDB connection to the same database), so concurrent requests overlap
+    without blocking the event loop. Cancelled or timed out queries are dropped
+    if still queued and interrupted inside DuckDB if already running.
+    """
+
+    def __init__(self, db_path: str, read_only: bool = False, max_workers: int = 4):
+        self.conn = duckdb.connect(database=db_path, read_only=read_only)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='duckdb')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self) -> None:
+        """Waits for running queries and closes the connection."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.conn.close()
+
+    async def _run(
+        self,
+        cursor: duckdb.DuckDBPyConnection,
+        fn: Callable[[], Any],
+        timeout: Optional[float],
+    ) -> Any:
+        future = self._executor.submit(fn)
+        waiter = asyncio.wrap_future(future)
+        try:
+            # Shielded so that the worker can be interrupted and awaited before the cursor closes
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.CancelledError, TimeoutError):
+            # A query still queued behind busy workers is simply dropped; interrupting
+            # is a no-op before it starts, so only a running query is interrupted and awaited
+            if not future.cancel():
+                cursor.interrupt()
+                await asyncio.gather(waiter, return_exceptions=True)
+            raise
+
+    async def fetch_table(self, table_name: str, timeout: Optional[float] = None) -> DataFrame:
+        """
+        Fetches an entire table from the database and returns it as a DataFrame.
+
+        Arguments:
+            table_name: The name of the table to fetch.
+            timeout: Seconds after which the query is interrupted.
+
+        Returns:
+            A DataFrame containing the contents of the specified table.
+        """
+        return await self.execute_query(f"SELECT * FROM {table_name};", timeout=timeout)
+
+    async def execute_query(
+        self,
+        query: str,
+        parameters: Optional[list] = None,
+        timeout: Optional[float] = None,
+    ) -> DataFrame:
+        """
+        Executes a SQL query against the database.
+
+        Arguments:
+            query: The SQL query to execute.
+            parameters: Optional values for the query's prepared-statement placeholders.
+            timeout: Seconds after which the query is interrupted.
+
+        Returns:
+            A DataFrame containing the results of the query.
+        """
+        cursor = self.conn.cursor()
+        try:
+            return await self._run(cursor, lambda: cursor.execute(query, parameters).df(), timeout)
+        finally:
+            cursor.close()
+
+    async def iter_record_batches(
+        self,
+        query: str,
+        parameters: Optional[list] = None,
+        batch_size: int = 100_000,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator:
+        """
+        Streams the result of a query as Arrow record batches (requires pyarrow).
+
+        Arguments:
+            query: The SQL query to execute.
+            parameters: Optional values for the query's prepared-statement placeholders.
+            batch_size: Maximum number of rows per record batch.
+            timeout: Seconds each step (execution or next batch) may take.
+
+        Yields:
+            pyarrow.RecordBatch objects.
+        """
+        cursor = self.conn.cursor()
+        try:
+            reader = await self._run(
+                cursor,
+                lambda: cursor.execute(query, parameters).fetch_record_batch(batch_size),
+                timeout,
+            )
+
+            def read_next_batch():
+                # StopIteration cannot cross a Future, so signal exhaustion with None
+                try:
+                    return reader.read_next_batch()
+                except StopIteration:
+                    return None
+
+            while (batch := await self._run(cursor, read_next_batch, timeout)) is not None:
+                yield batch
+        finally:
+            cursor.close()
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+import hashlib
+from pathlib import Path
+import re
+import threading
+from typing import Optional
+
+import duckdb
+from pandas import DataFrame
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a SQL query so that formatting differences share a cache entry.
+
+    Arguments:
+        query: The SQL query to normalize.
+
+    Returns:
+        The query with collapsed whitespace and without a trailing semicolon.
+    """
+    return re.sub(r'\s+', ' ', query).strip().rstrip(';').strip()
+
+
+class QueryCache:
+    """
+    LRU cache of query results bounded by an in-memory byte budget.
+
+    Entries evicted from memory stay available in the optional on-disk Parquet
+    tier and are promoted back to memory on the next hit. Callers are responsible
+    for putting table versions into the key so that rewrites never serve stale data.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str | Path] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: OrderedDict[str, tuple[DataFrame, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        """Bytes currently held in memory."""
+        return self._size
+
+    def _disk_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.disk_dir / f'{digest}.parquet'
+
+    def get(self, key: str) -> Optional[DataFrame]:
+        """
+        Looks up a cached result.
+
+        Arguments:
+            key: The cache key.
+
+        Returns:
+            A copy of the cached DataFrame, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            if path.exists():
+                df = duckdb.read_parquet(path.as_posix()).df()
+                self._put_memory(key, df)
+                with self._lock:
+                    self.hits += 1
+                return df.copy()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, df: DataFrame) -> None:
+        """
+        Stores a result in memory and, if configured, on disk.
+
+        Arguments:
+            key: The cache key.
+            df: The query result to cache.
+        """
+        df = df.copy()
+        self._put_memory(key, df)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            tmp_path = path.with_suffix('.parquet.tmp')
+            duckdb.from_df(df).write_parquet(tmp_path.as_posix(), compression='zstd')
+            tmp_path.replace(path)
+
+    def _put_memory(self, key: str, df: DataFrame) -> None:
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (df, nbytes)
+            self._size += nbytes
+            while self._size > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._size -= evicted_bytes
+
+    def clear(self) -> None:
+        """Drops every cached result from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob('*.parquet'):
+                path.unlink(missing_ok=True)
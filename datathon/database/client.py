@@ -1,10 +1,33 @@
+import json
+import re
+from typing import Optional
+import uuid
+
 import duckdb
 from pandas import DataFrame
 
+from datathon.database.cache import QueryCache, normalize_query
+
+
+# Schema-qualified tables written by a statement (identifiers may be quoted)
+WRITE_TABLES_PATTERN = re.compile(
+    r'\b(?:CREATE\s+(?:OR\s+REPLACE\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?'
+    r'|INSERT\s+(?:OR\s+REPLACE\s+)?INTO'
+    r'|DELETE\s+FROM'
+    r'|UPDATE'
+    r'|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)'
+    r'\s+"?([A-Za-z_]\w*)"?\."?([A-Za-z_]\w*)"?',
+    re.IGNORECASE,
+)
+
+READ_ONLY_STATEMENT_PATTERN = re.compile(r'^\s*(?:SELECT|WITH|FROM)\b', re.IGNORECASE)
+
 
 class DuckDBClient:
-    def __init__(self, db_path: str, read_only: bool = False):
+    def __init__(self, db_path: str, read_only: bool = False, cache: Optional[QueryCache] = None):
         self.conn = duckdb.connect(database=db_path, read_only=read_only)
+        self.read_only = read_only
+        self.cache = cache
 
     def __enter__(self):
         return self
@@ -23,12 +46,16 @@ class DuckDBClient:
             A DataFrame containing the contents of the specified table.
         """
         query = f"SELECT * FROM {table_name};"
-        return self.conn.execute(query).df()
+        return self.execute_query(query)
 
     def execute_query(self, query: str, df: DataFrame = None) -> DataFrame:
         """
         Executes a SQL query against the database.
 
+        Read-only queries over schema-qualified tables are served from the result
+        cache when one is configured. Statements that write tables bump their
+        version stamps so that cached results over them are no longer used.
+
         Arguments:
             query: The SQL query to execute.
             df: An optional DataFrame to register as a temporary table for the query.
@@ -36,6 +63,12 @@ class DuckDBClient:
         Returns:
             A DataFrame containing the results of the query.
         """
+        cache_key = self._cache_key(query) if df is None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         if df is not None:
             self.conn.register('temp_table', df)
             try:
@@ -44,4 +77,103 @@ class DuckDBClient:
                 self.conn.unregister('temp_table')
         else:
             result = self.conn.execute(query).df()
+
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        elif not self.read_only:
+            for schema, table in set(WRITE_TABLES_PATTERN.findall(query)):
+                self.bump_table_version(f"{schema}.{table}")
         return result
+
+    def table_versions(self, table_names: list[str]) -> dict[str, str]:
+        """
+        Fetches the current version stamps of the given tables.
+
+        Arguments:
+            table_names: Schema-qualified table names.
+
+        Returns:
+            A mapping of table name to version stamp; tables never written through
+            a DuckDBClient are absent.
+        """
+        placeholders = ', '.join('?' for _ in table_names)
+        try:
+            rows = self.conn.execute(
+                f"SELECT table_name, version FROM meta.table_versions WHERE table_name IN ({placeholders});",
+                [name.lower() for name in table_names],
+            ).fetchall()
+        except duckdb.CatalogException:
+            return {}
+        return dict(rows)
+
+    def bump_table_version(self, table_name: str) -> None:
+        """
+        Records that a table has been rewritten, invalidating cached reads of it.
+
+        Arguments:
+            table_name: The schema-qualified name of the written table.
+        """
+        self.conn.execute("CREATE SCHEMA IF NOT EXISTS meta;")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS meta.table_versions (
+                table_name VARCHAR PRIMARY KEY,
+                version VARCHAR
+            );
+        """)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta.table_versions VALUES (?, ?);",
+            [table_name.lower(), uuid.uuid4().hex],
+        )
+
+    def _cache_key(self, query: str) -> Optional[str]:
+        """Builds the result cache key for a query, or None if it must not be cached."""
+        if self.cache is None or not READ_ONLY_STATEMENT_PATTERN.match(query):
+            return None
+
+        table_names = self._read_tables(query)
+        if not table_names:
+            return None
+
+        versions = self.table_versions(table_names)
+        stamp = ','.join(f"{name}@{versions.get(name, '0')}" for name in table_names)
+        return f"{normalize_query(query)}|{stamp}"
+
+    def _read_tables(self, query: str) -> Optional[list[str]]:
+        """
+        Lists the tables a query reads, using DuckDB's own parser.
+
+        Returns None when the result cannot be tied to versioned tables: the query
+        does not parse as SELECT statements, reads a table function (e.g. a file),
+        or references a table that is not schema-qualified or lives in another catalog.
+        """
+        tree = json.loads(self.conn.execute("SELECT json_serialize_sql(?);", [query]).fetchone()[0])
+        if tree.get('error'):
+            return None
+
+        references, cte_names = [], set()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            if node.get('type') == 'TABLE_FUNCTION':
+                return None
+            if node.get('type') == 'BASE_TABLE':
+                references.append(node)
+            cte_names.update(entry['key'].lower() for entry in (node.get('cte_map') or {}).get('map', []))
+            stack.extend(node.values())
+
+        table_names = set()
+        for reference in references:
+            schema, table = reference['schema_name'].lower(), reference['table_name'].lower()
+            if reference.get('catalog_name'):
+                return None
+            if not schema:
+                if table in cte_names:
+                    continue
+                return None
+            table_names.add(f"{schema}.{table}")
+        return sorted(table_names)
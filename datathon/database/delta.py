@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+from pandas import DataFrame
+
+from datathon.database.client import DuckDBClient
+
+
+WriteMode = Literal['replace', 'upsert']
+
+
+@dataclass
+class ChangeSet:
+    """Keys of the rows a write inserted, updated and deleted."""
+    table: str
+    keys: list[str]
+    inserted: DataFrame
+    updated: DataFrame
+    deleted: DataFrame
+
+    @property
+    def is_empty(self) -> bool:
+        return self.inserted.empty and self.updated.empty and self.deleted.empty
+
+    def changed_keys(self) -> DataFrame:
+        """Keys whose rows were inserted or updated."""
+        return DataFrame(
+            [*self.inserted.itertuples(index=False), *self.updated.itertuples(index=False)],
+            columns=self.keys,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.table}: {len(self.inserted)} inserted, "
+            f"{len(self.updated)} updated, {len(self.deleted)} deleted"
+        )
+
+
+def _table_exists(db: DuckDBClient, table: str) -> bool:
+    schema, name = table.split('.')
+    return bool(db.conn.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE schema_name = ? AND table_name = ?;",
+        [schema, name],
+    ).fetchone()[0])
+
+
+def _columns(db: DuckDBClient, table: str) -> list[tuple]:
+    return [row[:2] for row in db.conn.execute(f"DESCRIBE {table};").fetchall()]
+
+
+def _has_unique_keys(db: DuckDBClient, table: str, keys: list[str]) -> bool:
+    key_list = ', '.join(keys)
+    return not db.conn.execute(
+        f"SELECT 1 FROM {table} GROUP BY {key_list} HAVING count(*) > 1 LIMIT 1;"
+    ).fetchone()
+
+
+def upsert_table(
+    db: DuckDBClient,
+    table: str,
+    source_query: str,
+    keys: list[str],
+    df: Optional[DataFrame] = None,
+    order_by: Optional[list[str]] = None,
+) -> ChangeSet:
+    """
+    Applies only the inserted, changed and deleted rows of a source to a table.
+
+    Rows are matched on the key columns and compared on all columns. All changes
+    are applied in a single transaction. The table is replaced instead when it
+    does not exist yet, when its schema differs from the source, or when the keys
+    are not unique in the source (a key-wise delta would collapse duplicates).
+    A replace reports every source row as inserted and every old row as deleted.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        table: The schema-qualified table to write.
+        source_query: A query producing the full desired contents of the table.
+        keys: The columns identifying a row.
+        df: An optional DataFrame registered as temp_table for the source query.
+        order_by: Columns the table is kept sorted by. Upserted rows are appended
+            at the end, so when rows were inserted or updated the table is
+            rewritten in this order within the same transaction.
+
+    Returns:
+        ChangeSet with the keys of inserted, updated and deleted rows.
+    """
+    source_query = source_query.strip().rstrip(';')
+    order_clause = f" ORDER BY {', '.join(order_by)}" if order_by else ''
+    key_list = ', '.join(keys)
+    # NULL keys match each other, as they would in a replace
+    key_match = ' AND '.join(f"t.{key} IS NOT DISTINCT FROM s.{key}" for key in keys)
+
+    if df is not None:
+        db.conn.register('temp_table', df)
+    try:
+        db.conn.execute("BEGIN TRANSACTION;")
+        try:
+            db.conn.execute(f"CREATE OR REPLACE TEMP TABLE delta_source AS {source_query};")
+
+            exists = _table_exists(db, table)
+            same_schema = exists and _columns(db, table) == _columns(db, 'delta_source')
+            replaced = not (same_schema and _has_unique_keys(db, 'delta_source', keys))
+            if not replaced:
+                db.conn.execute(f"""
+                    CREATE OR REPLACE TEMP TABLE delta_changed AS
+                    SELECT * FROM delta_source EXCEPT SELECT * FROM {table};
+                """)
+                inserted = db.conn.execute(f"""
+                    SELECT {key_list} FROM delta_changed s
+                    WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {key_match});
+                """).df()
+                updated = db.conn.execute(f"""
+                    SELECT {key_list} FROM delta_changed s
+                    WHERE EXISTS (SELECT 1 FROM {table} t WHERE {key_match});
+                """).df()
+                deleted = db.conn.execute(f"""
+                    SELECT {key_list} FROM {table} t
+                    WHERE NOT EXISTS (SELECT 1 FROM delta_source s WHERE {key_match});
+                """).df()
+
+                db.conn.execute(f"""
+                    DELETE FROM {table} t
+                    WHERE NOT EXISTS (SELECT 1 FROM delta_source s WHERE {key_match})
+                       OR EXISTS (SELECT 1 FROM delta_changed s WHERE {key_match});
+                """)
+                db.conn.execute(f"INSERT INTO {table} SELECT * FROM delta_changed;")
+                if order_by and not (inserted.empty and updated.empty):
+                    db.conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {table}{order_clause};")
+            else:
+                # The old table may lack key columns (e.g. before a schema change added them)
+                old_columns = {column for column, _ in _columns(db, table)} if exists else set()
+                inserted = db.conn.execute(f"SELECT {key_list} FROM delta_source;").df()
+                updated = DataFrame(columns=keys)
+                if set(keys) <= old_columns:
+                    deleted = db.conn.execute(f"SELECT {key_list} FROM {table};").df()
+                else:
+                    deleted = DataFrame(columns=keys)
+                db.conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM delta_source{order_clause};")
+            db.conn.execute("COMMIT;")
+        except Exception:
+            db.conn.execute("ROLLBACK;")
+            raise
+    finally:
+        if df is not None:
+            db.conn.unregister('temp_table')
+        db.conn.execute("DROP TABLE IF EXISTS delta_source;")
+        db.conn.execute("DROP TABLE IF EXISTS delta_changed;")
+
+    changes = ChangeSet(table=table, keys=keys, inserted=inserted, updated=updated, deleted=deleted)
+    if replaced or not changes.is_empty:
+        db.bump_table_version(table)
+    return changes
+
+
+def write_table(
+    db: DuckDBClient,
+    table: str,
+    source_query: str,
+    keys: list[str],
+    mode: WriteMode = 'replace',
+    df: Optional[DataFrame] = None,
+    order_by: Optional[list[str]] = None,
+) -> Optional[ChangeSet]:
+    """
+    Writes the result of a query to a table, either rewriting it or upserting the delta.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        table: The schema-qualified table to write.
+        source_query: A query producing the full desired contents of the table.
+        keys: The columns identifying a row (used in upsert mode).
+        mode: 'replace' rewrites the whole table, 'upsert' applies only the changes.
+        df: An optional DataFrame registered as temp_table for the source query.
+        order_by: Columns the table is kept sorted by, in either mode.
+
+    Returns:
+        ChangeSet in upsert mode, None in replace mode.
+    """
+    if mode == 'upsert':
+        changes = upsert_table(db, table, source_query, keys, df, order_by)
+        print(changes)
+        return changes
+    if mode != 'replace':
+        raise ValueError(f"Unknown write mode: {mode}")
+
+    source_query = source_query.strip().rstrip(';')
+    if order_by:
+        source_query = f"SELECT * FROM ({source_query}) ORDER BY {', '.join(order_by)}"
+    db.execute_query(f"CREATE OR REPLACE TABLE {table} AS {source_query};", df)
+    return None
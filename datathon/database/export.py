@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import shutil
+
+from datathon.database.client import DuckDBClient
+
+
+PARQUET_COMPRESSION = 'zstd'
+PARQUET_ROW_GROUP_SIZE = 122_880
+
+
+def _copy_partitioned(
+    db: DuckDBClient,
+    select_query: str,
+    output_path: Path,
+    row_group_size: int,
+) -> None:
+    """
+    Writes the result of a query as hive-style Parquet partitions keyed on year.
+
+    DuckDB writes min/max statistics for every row group, which lets readers prune
+    both partitions (from the path) and row groups (from the footer).
+    """
+    copy_query = f"""
+        COPY ({select_query}) TO '{output_path.as_posix()}' (
+            FORMAT PARQUET,
+            COMPRESSION {PARQUET_COMPRESSION},
+            ROW_GROUP_SIZE {row_group_size},
+            PARTITION_BY (year),
+            OVERWRITE_OR_IGNORE
+        );
+    """
+    db.conn.execute(copy_query)
+
+
+def _describe_dataset(db: DuckDBClient, name: str, output_path: Path) -> dict:
+    """
+    Builds the manifest entry for an exported dataset from the written files.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        name: The name of the exported table.
+        output_path: The root directory of the dataset partitions.
+
+    Returns:
+        A dictionary with the schema, partitions, files and row counts.
+    """
+    glob = f"{output_path.as_posix()}/*/*.parquet"
+    partitions = db.conn.execute(f"""
+        SELECT year, count(*) AS row_count
+        FROM read_parquet('{glob}', hive_partitioning = true, union_by_name = true)
+        GROUP BY year
+        ORDER BY year;
+    """).fetchall()
+    columns = db.conn.execute(f"""
+        DESCRIBE SELECT *
+        FROM read_parquet('{glob}', hive_partitioning = true, union_by_name = true);
+    """).fetchall()
+
+    return {
+        'table': name,
+        'path': output_path.as_posix(),
+        'partition_by': ['year'],
+        'columns': [{'name': col[0], 'type': col[1]} for col in columns],
+        'partitions': [
+            {
+                'year': int(year),
+                'rows': int(rows),
+                'files': sorted(
+                    path.as_posix()
+                    for path in (output_path / f'year={year}').glob('*.parquet')
+                ),
+            }
+            for year, rows in partitions
+        ],
+        'rows': int(sum(rows for _, rows in partitions)),
+    }
+
+
+def export_refined_tables(
+    db: DuckDBClient,
+    years: list[int],
+    output_dir: str | Path = 'data/parquet',
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> Path:
+    """
+    Exports the refined tables as year-partitioned, zstd-compressed Parquet files.
+
+    Layout:
+        {output_dir}/students/year=YYYY/*.parquet  (refined.students)
+        {output_dir}/history/year=YYYY/*.parquet   (refined.student_history)
+        {output_dir}/data/year=YYYY/*.parquet      (refined.data_{year})
+        {output_dir}/manifest.json
+
+    The per-year tables keep their year-suffixed schemas, so readers of the data
+    dataset should use `union_by_name = true`.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        years: The years of the refined.data_{year} tables to export.
+        output_dir: Directory where the Parquet datasets and manifest are written.
+        row_group_size: Number of rows per Parquet row group.
+
+    Returns:
+        Path to the written manifest.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Each export fully replaces the partitions it writes
+    students_path = output_dir / 'students'
+    shutil.rmtree(students_path, ignore_errors=True)
+    _copy_partitioned(db, 'SELECT * FROM refined.students', students_path, row_group_size)
+
+    history_path = output_dir / 'history'
+    shutil.rmtree(history_path, ignore_errors=True)
+    _copy_partitioned(db, 'SELECT * FROM refined.student_history', history_path, row_group_size)
+
+    data_path = output_dir / 'data'
+    for year in years:
+        shutil.rmtree(data_path / f'year={year}', ignore_errors=True)
+        _copy_partitioned(
+            db,
+            f'SELECT *, {year} AS year FROM refined.data_{year}',
+            data_path,
+            row_group_size,
+        )
+
+    manifest = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'format': 'parquet',
+        'compression': PARQUET_COMPRESSION,
+        'row_group_size': row_group_size,
+        'datasets': [
+            _describe_dataset(db, 'refined.students', students_path),
+            _describe_dataset(db, 'refined.student_history', history_path),
+            _describe_dataset(db, 'refined.data', data_path),
+        ],
+    }
+
+    # Write-then-rename so readers never observe a partially written manifest
+    manifest_path = output_dir / 'manifest.json'
+    tmp_path = manifest_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    print(f"Parquet export manifest saved to: {manifest_path}")
+    return manifest_path
@@ -0,0 +1,133 @@
+from pathlib import Path
+
+from datathon.database.client import DuckDBClient
+from datathon.preprocessing.mapping import COLUMN_MAPPINGS
+
+
+def _raw_column(year: int, refined_name: str) -> str:
+    """Original (raw) name of the column renamed to refined_name for a year."""
+    for raw_name, name in COLUMN_MAPPINGS[year].items():
+        if name == refined_name:
+            return raw_name
+    raise KeyError(f"No raw column maps to {refined_name}")
+
+
+def stratified_keys_query(strata_query: str, fraction: float, seed: int) -> str:
+    """
+    Builds a deterministic, stratified sample of student keys.
+
+    Within each stratum students are ordered by a hash of their ra, and the first
+    ceil(fraction * stratum size) are kept. The same ra is therefore kept in every
+    year and across runs with the same seed, and each stratum keeps its share.
+
+    Arguments:
+        strata_query: A query producing (ra VARCHAR, stratum) rows, one per student.
+        fraction: Fraction of students to keep, in (0, 1].
+        seed: Salt mixed into the hash to draw a different sample.
+
+    Returns:
+        A query producing the sampled ra values.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Sample fraction must be in (0, 1], got {fraction}")
+    return f"""
+        SELECT ra
+        FROM ({strata_query}) strata
+        QUALIFY row_number() OVER (PARTITION BY stratum ORDER BY hash(ra || '{seed}'), ra)
+            <= ceil({fraction} * count(*) OVER (PARTITION BY stratum))
+    """
+
+
+def raw_strata_query(years: list[int], schema: str = 'raw') -> str:
+    """
+    Stratifies students in the raw tables by whether their lag ever worsened
+    from one year to the next (the training target).
+
+    Arguments:
+        years: The years of the raw.data_{year} tables.
+        schema: The (possibly attached) schema holding the raw tables.
+
+    Returns:
+        A query producing (ra, stratum) rows.
+    """
+    lags = "\n            UNION ALL\n            ".join(
+        f'SELECT CAST("{_raw_column(year, f"ra_{year}")}" AS VARCHAR) AS ra, {year} AS year, '
+        f'TRY_CAST("{_raw_column(year, f"lag_{year}")}" AS DOUBLE) AS lag '
+        f'FROM {schema}.data_{year}'
+        for year in years
+    )
+    return f"""
+        SELECT ra, CAST(coalesce(bool_or(worsened), false) AS INTEGER) AS stratum
+        FROM (
+            SELECT
+                ra,
+                lead(lag) OVER w > lag AND lead(year) OVER w = year + 1 AS worsened
+            FROM (
+            {lags}
+            ) lags
+            WINDOW w AS (PARTITION BY ra ORDER BY year)
+        ) transitions
+        GROUP BY ra
+    """
+
+
+def sample_students_query(fraction: float, seed: int = 42) -> str:
+    """
+    Builds a query returning a stratified sample of refined.students.
+
+    Arguments:
+        fraction: Fraction of students to keep, in (0, 1].
+        seed: Salt mixed into the hash to draw a different sample.
+
+    Returns:
+        A query producing the sampled refined.students rows.
+    """
+    strata_query = """
+        SELECT CAST(ra AS VARCHAR) AS ra, CAST(bool_or(lag_next > lag_current) AS INTEGER) AS stratum
+        FROM refined.students
+        GROUP BY 1
+    """
+    keys_query = stratified_keys_query(strata_query, fraction, seed)
+    return f"SELECT * FROM refined.students WHERE CAST(ra AS VARCHAR) IN ({keys_query});"
+
+
+def create_sample_database(
+    source_path: str | Path,
+    sample_path: str | Path,
+    years: list[int],
+    fraction: float,
+    seed: int = 42,
+) -> None:
+    """
+    Copies a stratified, ra-consistent sample of the raw tables into a separate database.
+
+    The sample is selected and copied inside DuckDB, so the source database is
+    only read and the pipeline can run on the sample unchanged.
+
+    Arguments:
+        source_path: The full database.
+        sample_path: The database to (re)create with the sampled raw tables.
+        years: The years of the raw.data_{year} tables.
+        fraction: Fraction of students to keep, in (0, 1].
+        seed: Salt mixed into the hash to draw a different sample.
+    """
+    Path(sample_path).parent.mkdir(parents=True, exist_ok=True)
+    with DuckDBClient(str(sample_path)) as db:
+        db.conn.execute(f"ATTACH '{Path(source_path).as_posix()}' AS source (READ_ONLY);")
+        try:
+            db.conn.execute("CREATE SCHEMA IF NOT EXISTS raw;")
+            db.conn.execute("CREATE SCHEMA IF NOT EXISTS refined;")
+            keys_query = stratified_keys_query(raw_strata_query(years, schema='source.raw'), fraction, seed)
+            db.conn.execute(f"CREATE OR REPLACE TEMP TABLE sample_keys AS {keys_query};")
+
+            for year in years:
+                ra_column = _raw_column(year, f"ra_{year}")
+                db.execute_query(f"""
+                    CREATE OR REPLACE TABLE raw.data_{year} AS
+                    SELECT * FROM source.raw.data_{year}
+                    WHERE CAST("{ra_column}" AS VARCHAR) IN (SELECT ra FROM sample_keys);
+                """)
+            sampled = db.conn.execute("SELECT count(*) FROM sample_keys;").fetchone()[0]
+            print(f"Sampled {sampled} students ({fraction:.0%}) into: {sample_path}")
+        finally:
+            db.conn.execute("DETACH source;")
@@ -0,0 +1,87 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from datathon.database.client import DuckDBClient
+from datathon.modeling.train import (
+    FEATURE_COLUMNS,
+    MODEL_ENGINES,
+    ModelEngine,
+    build_estimator,
+    prepare_training_matrix,
+)
+
+
+def benchmark_engines(
+    df: pd.DataFrame,
+    engines: tuple[ModelEngine, ...] = MODEL_ENGINES,
+    feature_columns: list[str] = FEATURE_COLUMNS,
+    repeats: int = 3,
+    test_size: float = 0.2,
+    random_state: int = 42,
+) -> pd.DataFrame:
+    """
+    Compares fit time, predict time and test metrics of the model engines.
+
+    Every engine is trained on the same stratified split. Timings are the best of
+    `repeats` runs; the preparation time covers imputation and scaling.
+
+    Arguments:
+        df: DataFrame with student data.
+        engines: Model engines to compare.
+        feature_columns: Features to train on.
+        repeats: Number of timed runs per engine.
+        test_size: Fraction for test set.
+        random_state: Random seed.
+
+    Returns:
+        DataFrame with one row per engine.
+    """
+    y = (df['lag_next'] > df['lag_current']).astype(int).to_numpy()
+    train_positions, test_positions = train_test_split(
+        np.arange(len(df)), test_size=test_size, random_state=random_state, stratify=y
+    )
+
+    rows = []
+    for engine in engines:
+        prepare_seconds, fit_seconds, predict_seconds = [], [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            X, _ = prepare_training_matrix(df, feature_columns, engine)
+            prepare_seconds.append(time.perf_counter() - start)
+
+            model = build_estimator(engine, random_state)
+            start = time.perf_counter()
+            model.fit(X[train_positions], y[train_positions])
+            fit_seconds.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            y_proba = model.predict_proba(X[test_positions])[:, 1]
+            predict_seconds.append(time.perf_counter() - start)
+
+        y_test = y[test_positions]
+        rows.append({
+            'engine': engine,
+            'prepare_seconds': min(prepare_seconds),
+            'fit_seconds': min(fit_seconds),
+            'predict_seconds': min(predict_seconds),
+            'predict_rows_per_second': len(test_positions) / min(predict_seconds),
+            'iterations': getattr(model, 'n_iter_', getattr(model, 'n_estimators', None)),
+            'f1': f1_score(y_test, (y_proba >= 0.5).astype(int)),
+            'auc_roc': roc_auc_score(y_test, y_proba),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the model engines on refined.students.")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per engine.")
+    args = parser.parse_args()
+
+    with DuckDBClient('data/duckdb/datathon.db', read_only=True) as db:
+        students = db.fetch_table('refined.students')
+    print(benchmark_engines(students, repeats=args.repeats).to_string(index=False))
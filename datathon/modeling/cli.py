@@ -0,0 +1,41 @@
+import argparse
+
+from datathon.database.client import DuckDBClient
+from datathon.database.sampling import sample_students_query
+from datathon.modeling.train import FEATURE_COLUMNS, MODEL_ENGINES, train
+from datathon.preprocessing.temporal import TEMPORAL_FEATURE_COLUMNS
+
+
+def main() -> None:
+    """Train on refined.students and save the model (sampled runs are not saved)."""
+    parser = argparse.ArgumentParser(description="Train the lag-worsening model.")
+    parser.add_argument('--engine', choices=MODEL_ENGINES, default='random_forest', help="Model engine.")
+    parser.add_argument('--temporal', action='store_true', help="Include TEMPORAL_FEATURE_COLUMNS.")
+    parser.add_argument(
+        '--sample',
+        type=float,
+        metavar='FRACTION',
+        help="Train on a deterministic, stratified sample of students (e.g. 0.1).",
+    )
+    parser.add_argument('--seed', type=int, default=42, help="Salt of the sample hash.")
+    parser.add_argument('--output', default='models/lag_worsening.pkl', help="Where to save the model.")
+    args = parser.parse_args()
+
+    with DuckDBClient('data/duckdb/datathon.db', read_only=True) as db:
+        if args.sample is not None:
+            students = db.execute_query(sample_students_query(args.sample, args.seed))
+        else:
+            students = db.fetch_table('refined.students')
+
+    feature_columns = FEATURE_COLUMNS + TEMPORAL_FEATURE_COLUMNS if args.temporal else FEATURE_COLUMNS
+    trained = train(students, feature_columns=feature_columns, engine=args.engine)
+    print(trained.metrics)
+    print(trained.evaluation)
+
+    if args.sample is None:
+        trained.save(args.output)
+        print(f"Model saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+import copy
+from dataclasses import dataclass, field
+import math
+import random
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from datathon.preprocessing.transformations import ENCODED_CATEGORICAL_COLUMNS
+
+
+# Conventional PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift
+PSI_WARNING_THRESHOLD = 0.1
+PSI_ALERT_THRESHOLD = 0.25
+
+# Floor for empty bins so PSI stays finite
+_PSI_EPSILON = 1e-4
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch over a numeric stream.
+
+    Keeps a hierarchy of compactors whose items at level h stand for 2**h
+    observations, so memory stays O(k log n) regardless of the stream length.
+    Sketches built on different batches can be merged.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.count = 0
+        self.compactors: list[list[float]] = [[]]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Adds a batch of values to the sketch; NaNs are ignored.
+
+        Arguments:
+            values: The values to add.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.compactors[0].extend(values.tolist())
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> None:
+        """
+        Merges another sketch into this one.
+
+        Arguments:
+            other: The sketch to merge.
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        while True:
+            for level in range(len(self.compactors)):
+                if len(self.compactors[level]) > self._capacity(level):
+                    break
+            else:
+                return
+
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+            items = sorted(self.compactors[level])
+            # An odd leftover item stays at this level to preserve total weight
+            leftover = [items.pop()] if len(items) % 2 else []
+            offset = self._rng.randint(0, 1)
+            self.compactors[level + 1].extend(items[offset::2])
+            self.compactors[level] = leftover
+
+    def _weighted_items(self) -> tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate([np.asarray(items, dtype=float) for items in self.compactors])
+        weights = np.concatenate([
+            np.full(len(items), 2.0 ** level) for level, items in enumerate(self.compactors)
+        ])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def cdf(self, points: np.ndarray) -> np.ndarray:
+        """
+        Estimates the fraction of observations less than or equal to each point.
+
+        Arguments:
+            points: The points at which to evaluate the CDF.
+
+        Returns:
+            Array of estimated CDF values.
+        """
+        points = np.asarray(points, dtype=float)
+        if self.count == 0:
+            return np.full(points.shape, np.nan)
+        values, weights = self._weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        return cumulative[np.searchsorted(values, points, side='right')] / cumulative[-1]
+
+    def quantiles(self, qs: np.ndarray) -> np.ndarray:
+        """
+        Estimates quantiles of the stream.
+
+        Arguments:
+            qs: Quantile levels in [0, 1].
+
+        Returns:
+            Array of estimated quantile values.
+        """
+        qs = np.asarray(qs, dtype=float)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        values, weights = self._weighted_items()
+        cumulative = np.cumsum(weights) / weights.sum()
+        indices = np.searchsorted(cumulative, qs, side='left')
+        return values[np.minimum(indices, len(values) - 1)]
+
+
+class CategoryHistogram:
+    """Exact counts per category; mergeable and bounded by the number of categories."""
+
+    def __init__(self):
+        self.count = 0
+        self.counts: dict[float, int] = {}
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Adds a batch of category codes; NaNs are ignored.
+
+        Arguments:
+            values: The category codes to add.
+        """
+        series = pd.Series(values).dropna()
+        for category, count in series.value_counts().items():
+            self.counts[category] = self.counts.get(category, 0) + int(count)
+        self.count += len(series)
+
+    def merge(self, other: 'CategoryHistogram') -> None:
+        """
+        Merges another histogram into this one.
+
+        Arguments:
+            other: The histogram to merge.
+        """
+        for category, count in other.counts.items():
+            self.counts[category] = self.counts.get(category, 0) + count
+        self.count += other.count
+
+    def frequencies(self, categories: list) -> np.ndarray:
+        """Relative frequency of each of the given categories."""
+        if self.count == 0:
+            return np.full(len(categories), np.nan)
+        return np.array([self.counts.get(c, 0) for c in categories], dtype=float) / self.count
+
+
+def _population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    expected = np.clip(expected, _PSI_EPSILON, None)
+    actual = np.clip(actual, _PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+@dataclass
+class FeatureDrift:
+    """Drift statistics for a single feature."""
+    feature: str
+    kind: str
+    psi: float
+    ks: Optional[float]
+    reference_count: int
+    current_count: int
+
+    @property
+    def status(self) -> str:
+        if math.isnan(self.psi):
+            return 'no data'
+        if self.psi >= PSI_ALERT_THRESHOLD:
+            return 'alert'
+        if self.psi >= PSI_WARNING_THRESHOLD:
+            return 'warning'
+        return 'stable'
+
+
+@dataclass
+class DriftReport:
+    """Drift analysis of scoring inputs against the training distribution."""
+    features: list[FeatureDrift]
+
+    def __str__(self) -> str:
+        lines = [
+            "=" * 80,
+            "FEATURE DRIFT REPORT (PSI / KS)",
+            "=" * 80,
+            f"{'Feature':<16} {'Kind':<12} {'Ref N':>8} {'Cur N':>8} {'PSI':>8} {'KS':>8} {'Status':>9}",
+            "-" * 80,
+        ]
+        for drift in self.features:
+            ks = f"{drift.ks:>8.3f}" if drift.ks is not None else f"{'-':>8}"
+            lines.append(
+                f"{drift.feature:<16} {drift.kind:<12} {drift.reference_count:>8} "
+                f"{drift.current_count:>8} {drift.psi:>8.3f} {ks} {drift.status:>9}"
+            )
+        lines.append("=" * 80)
+        return "\n".join(lines)
+
+
+@dataclass
+class DriftMonitor:
+    """
+    Compares scoring inputs to the training distribution with constant memory.
+
+    The reference profile is captured once from the training data; the current
+    profile is updated incrementally from each scoring batch. Updates, merges and
+    reports take a lock, so one monitor can be shared by concurrent scorers.
+    """
+    feature_columns: list[str]
+    reference: dict[str, KLLSketch | CategoryHistogram]
+    current: dict[str, KLLSketch | CategoryHistogram] = field(default_factory=dict)
+    k: int = 200
+    n_bins: int = 10
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_profile(feature: str, k: int, seed: int) -> KLLSketch | CategoryHistogram:
+        if feature in ENCODED_CATEGORICAL_COLUMNS:
+            return CategoryHistogram()
+        return KLLSketch(k=k, seed=seed)
+
+    @classmethod
+    def from_training(
+        cls,
+        df: pd.DataFrame,
+        feature_columns: list[str],
+        k: int = 200,
+        n_bins: int = 10,
+    ) -> 'DriftMonitor':
+        """
+        Captures the reference distribution of each feature.
+
+        Arguments:
+            df: The training data, before imputation.
+            feature_columns: The model features to monitor.
+            k: KLL sketch accuracy parameter (larger is more accurate).
+            n_bins: Number of reference quantile bins used for PSI.
+
+        Returns:
+            A DriftMonitor with an empty current profile.
+        """
+        reference = {}
+        for seed, feature in enumerate(feature_columns):
+            reference[feature] = cls._new_profile(feature, k, seed)
+            reference[feature].update(df[feature].to_numpy(dtype=float))
+        monitor = cls(feature_columns=list(feature_columns), reference=reference, k=k, n_bins=n_bins)
+        monitor.reset()
+        return monitor
+
+    def _empty_window(self) -> dict[str, KLLSketch | CategoryHistogram]:
+        return {
+            feature: self._new_profile(feature, self.k, seed)
+            for seed, feature in enumerate(self.feature_columns)
+        }
+
+    def reset(self) -> None:
+        """Starts a new current window."""
+        window = self._empty_window()
+        with self._lock:
+            self.current = window
+
+    def fresh(self) -> 'DriftMonitor':
+        """
+        A monitor with the same reference profile and an empty current window.
+
+        Returns:
+            The new monitor (the reference sketches are shared, as they are never updated).
+        """
+        return DriftMonitor(
+            feature_columns=self.feature_columns,
+            reference=self.reference,
+            current=self._empty_window(),
+            k=self.k,
+            n_bins=self.n_bins,
+        )
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Adds a scoring batch to the current profile.
+
+        Arguments:
+            df: The scoring inputs, before imputation.
+        """
+        values = {
+            feature: df[feature].to_numpy(dtype=float)
+            for feature in self.feature_columns
+            if feature in df.columns
+        }
+        with self._lock:
+            for feature, feature_values in values.items():
+                self.current[feature].update(feature_values)
+
+    def merge(self, other: 'DriftMonitor') -> None:
+        """
+        Merges the current profile of another monitor (e.g. another scorer process).
+
+        Arguments:
+            other: A monitor over the same features.
+        """
+        # Copied first so that two monitors merging each other cannot deadlock
+        with other._lock:
+            other_current = copy.deepcopy(other.current)
+        with self._lock:
+            for feature in self.feature_columns:
+                self.current[feature].merge(other_current[feature])
+
+    def report(self) -> DriftReport:
+        """
+        Scores drift of the current profile against the reference.
+
+        Returns:
+            DriftReport with PSI for every feature and KS for numeric features.
+        """
+        with self._lock:
+            current_window = copy.deepcopy(self.current)
+
+        features = []
+        for feature in self.feature_columns:
+            reference = self.reference[feature]
+            current = current_window[feature]
+
+            if isinstance(reference, CategoryHistogram):
+                categories = sorted(set(reference.counts) | set(current.counts))
+                psi = _population_stability_index(
+                    reference.frequencies(categories), current.frequencies(categories)
+                ) if reference.count and current.count else float('nan')
+                features.append(FeatureDrift(feature, 'categorical', psi, None, reference.count, current.count))
+                continue
+
+            if reference.count and current.count:
+                # PSI over reference quantile bins; inner edges only, so the outer bins are open
+                edges = np.unique(reference.quantiles(np.linspace(0, 1, self.n_bins + 1)[1:-1]))
+                expected = np.diff(np.concatenate([[0.0], reference.cdf(edges), [1.0]]))
+                actual = np.diff(np.concatenate([[0.0], current.cdf(edges), [1.0]]))
+                psi = _population_stability_index(expected, actual)
+
+                points = np.concatenate([
+                    reference.quantiles(np.linspace(0, 1, 101)),
+                    current.quantiles(np.linspace(0, 1, 101)),
+                ])
+                ks = float(np.max(np.abs(reference.cdf(points) - current.cdf(points))))
+            else:
+                psi, ks = float('nan'), float('nan')
+            features.append(FeatureDrift(feature, 'numeric', psi, ks, reference.count, current.count))
+
+        return DriftReport(features=features)
@@ -0,0 +1,367 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+THRESHOLD_METRICS = ['accuracy', 'precision', 'recall', 'f1']
+BOOTSTRAP_METRICS = THRESHOLD_METRICS + ['auc_roc']
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray, default: float = 0.0) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.full(np.broadcast(numerator, denominator).shape, default)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+@dataclass
+class ThresholdCurve:
+    """
+    Confusion counts at every distinct score threshold.
+
+    Thresholds are in descending order and a sample is predicted positive when
+    its score is >= the threshold. The first entry is +inf (nothing predicted
+    positive), so the ROC curve starts at its origin. Precision is 0 when nothing
+    is predicted positive, matching sklearn's precision_score.
+    """
+    thresholds: np.ndarray
+    tp: np.ndarray
+    fp: np.ndarray
+    positives: int
+    negatives: int
+
+    @property
+    def fn(self) -> np.ndarray:
+        return self.positives - self.tp
+
+    @property
+    def tn(self) -> np.ndarray:
+        return self.negatives - self.fp
+
+    @property
+    def precision(self) -> np.ndarray:
+        return _safe_divide(self.tp, self.tp + self.fp)
+
+    @property
+    def recall(self) -> np.ndarray:
+        return _safe_divide(self.tp, self.positives)
+
+    @property
+    def fpr(self) -> np.ndarray:
+        return _safe_divide(self.fp, self.negatives)
+
+    @property
+    def f1(self) -> np.ndarray:
+        return _safe_divide(2 * self.tp, 2 * self.tp + self.fp + self.fn)
+
+    @property
+    def accuracy(self) -> np.ndarray:
+        return (self.tp + self.tn) / (self.positives + self.negatives)
+
+    @property
+    def auc_roc(self) -> float:
+        if self.positives == 0 or self.negatives == 0:
+            return float('nan')
+        return float(np.trapezoid(self.recall, self.fpr))
+
+    @property
+    def average_precision(self) -> float:
+        return float(np.sum(np.diff(self.recall) * self.precision[1:]))
+
+    def to_frame(self) -> pd.DataFrame:
+        """All threshold metrics as a DataFrame, one row per threshold."""
+        return pd.DataFrame({
+            'threshold': self.thresholds,
+            'tp': self.tp,
+            'fp': self.fp,
+            'fn': self.fn,
+            'tn': self.tn,
+            'fpr': self.fpr,
+            **{metric: getattr(self, metric) for metric in THRESHOLD_METRICS},
+        })
+
+    def at(self, threshold: float) -> dict[str, float]:
+        """
+        Metrics at an arbitrary threshold, without rescoring.
+
+        Arguments:
+            threshold: The decision threshold.
+
+        Returns:
+            Mapping of metric name to value.
+        """
+        # Last curve point whose threshold is still >= the requested one
+        index = np.searchsorted(-self.thresholds, -threshold, side='right') - 1
+        return {metric: float(getattr(self, metric)[index]) for metric in THRESHOLD_METRICS}
+
+    def best_threshold(self, metric: str = 'f1') -> float:
+        """
+        Threshold maximizing a metric.
+
+        Arguments:
+            metric: One of accuracy, precision, recall or f1.
+
+        Returns:
+            The best finite threshold.
+        """
+        values = getattr(self, metric)[1:]
+        return float(self.thresholds[1:][np.argmax(values)])
+
+
+def threshold_curve(y_true: np.ndarray, y_score: np.ndarray) -> ThresholdCurve:
+    """
+    Computes confusion counts at every threshold in one sorted cumulative pass.
+
+    Arguments:
+        y_true: Binary labels.
+        y_score: Predicted probabilities of the positive class.
+
+    Returns:
+        ThresholdCurve over all distinct scores.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=float)
+
+    order = np.argsort(-y_score, kind='mergesort')
+    y_sorted = y_true[order]
+    score_sorted = y_score[order]
+
+    # Index of the last sample of each run of tied scores
+    last = np.r_[np.flatnonzero(np.diff(score_sorted)), len(score_sorted) - 1]
+    tp = np.cumsum(y_sorted)[last]
+    fp = (last + 1) - tp
+
+    return ThresholdCurve(
+        thresholds=np.r_[np.inf, score_sorted[last]],
+        tp=np.r_[0, tp],
+        fp=np.r_[0, fp],
+        positives=int(y_true.sum()),
+        negatives=int((~y_true).sum()),
+    )
+
+
+@dataclass
+class ConfidenceInterval:
+    """Point estimate with a bootstrap percentile interval."""
+    estimate: float
+    lower: float
+    upper: float
+
+
+def _positive_rank_sums(y: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """Row-wise sum of the (1-based, tie-averaged) score ranks of the positives."""
+    n = scores.shape[1]
+    order = np.argsort(scores, axis=1, kind='mergesort')
+    sorted_scores = np.take_along_axis(scores, order, axis=1)
+    positions = np.broadcast_to(np.arange(n), scores.shape)
+
+    # Tied scores share the mean of the first and last position of their run
+    starts = np.ones(scores.shape, dtype=bool)
+    starts[:, 1:] = sorted_scores[:, 1:] != sorted_scores[:, :-1]
+    ends = np.ones(scores.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, positions, n)[:, ::-1], axis=1)[:, ::-1]
+    ranks = (first + last) / 2 + 1
+
+    return np.where(np.take_along_axis(y, order, axis=1), ranks, 0.0).sum(axis=1)
+
+
+def _bootstrap_chunk(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    threshold: float,
+    size: int,
+    seed: np.random.SeedSequence,
+) -> dict[str, np.ndarray]:
+    n = len(y_true)
+    indices = np.random.default_rng(seed).integers(0, n, size=(size, n))
+    y = y_true[indices]
+    scores = y_score[indices]
+    pred = scores >= threshold
+
+    tp = (pred & y).sum(axis=1)
+    fp = (pred & ~y).sum(axis=1)
+    fn = (~pred & y).sum(axis=1)
+    tn = n - tp - fp - fn
+
+    # AUC via the Mann-Whitney U statistic with average ranks for ties
+    positives = y.sum(axis=1)
+    negatives = n - positives
+    rank_sum = _positive_rank_sums(y, scores)
+    auc = _safe_divide(rank_sum - positives * (positives + 1) / 2, positives * negatives, default=np.nan)
+
+    return {
+        'accuracy': (tp + tn) / n,
+        'precision': _safe_divide(tp, tp + fp),
+        'recall': _safe_divide(tp, tp + fn),
+        'f1': _safe_divide(2 * tp, 2 * tp + fp + fn),
+        'auc_roc': auc,
+    }
+
+
+def bootstrap_confidence_intervals(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    threshold: float = 0.5,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    random_state: int = 42,
+    n_jobs: int = -1,
+    chunk_size: int = 250,
+) -> dict[str, ConfidenceInterval]:
+    """
+    Bootstrap percentile intervals for the threshold metrics and AUC.
+
+    Resamples are drawn as index matrices and evaluated in vectorized chunks,
+    which are spread over a thread pool (NumPy releases the GIL while sorting
+    and reducing).
+
+    Arguments:
+        y_true: Binary labels.
+        y_score: Predicted probabilities of the positive class.
+        threshold: Decision threshold for the threshold metrics.
+        n_resamples: Number of bootstrap resamples.
+        confidence: Confidence level of the intervals.
+        random_state: Random seed.
+        n_jobs: Number of worker threads (-1 for all CPUs).
+        chunk_size: Resamples evaluated per vectorized chunk.
+
+    Returns:
+        Mapping of metric name to ConfidenceInterval.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=float)
+
+    sizes = [chunk_size] * (n_resamples // chunk_size)
+    if n_resamples % chunk_size:
+        sizes.append(n_resamples % chunk_size)
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    max_workers = os.cpu_count() if n_jobs == -1 else n_jobs
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chunks = list(executor.map(
+            lambda args: _bootstrap_chunk(y_true, y_score, threshold, *args),
+            zip(sizes, seeds),
+        ))
+
+    curve = threshold_curve(y_true, y_score)
+    estimates = {**curve.at(threshold), 'auc_roc': curve.auc_roc}
+    alpha = (1 - confidence) / 2
+
+    intervals = {}
+    for metric in BOOTSTRAP_METRICS:
+        samples = np.concatenate([chunk[metric] for chunk in chunks])
+        lower, upper = np.nanquantile(samples, [alpha, 1 - alpha])
+        intervals[metric] = ConfidenceInterval(
+            estimate=estimates[metric],
+            lower=float(lower),
+            upper=float(upper),
+        )
+    return intervals
+
+
+def slice_metrics(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    slices: pd.DataFrame,
+    threshold: float = 0.5,
+) -> pd.DataFrame:
+    """
+    Metrics per value of each slice column (e.g. per year and per stone).
+
+    Arguments:
+        y_true: Binary labels.
+        y_score: Predicted probabilities of the positive class.
+        slices: DataFrame aligned with y_true whose columns define the slices.
+        threshold: Decision threshold.
+
+    Returns:
+        DataFrame with one row per (slice column, value).
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=float)
+
+    rows = []
+    for column in slices.columns:
+        for value, positions in slices.groupby(column, sort=True).indices.items():
+            curve = threshold_curve(y_true[positions], y_score[positions])
+            rows.append({
+                'slice': column,
+                'value': value,
+                'count': len(positions),
+                'positives': curve.positives,
+                **curve.at(threshold),
+                'auc_roc': curve.auc_roc,
+            })
+    return pd.DataFrame(rows)
+
+
+@dataclass
+class EvaluationReport:
+    """Threshold curves, bootstrap intervals and slice metrics for a model."""
+    threshold: float
+    curve: ThresholdCurve
+    confidence_intervals: dict[str, ConfidenceInterval]
+    slices: pd.DataFrame
+
+    def __str__(self) -> str:
+        lines = [
+            "=" * 70,
+            f"EVALUATION REPORT (threshold={self.threshold:.2f})",
+            "=" * 70,
+            f"{'Metric':<12} {'Estimate':>10} {'Lower':>10} {'Upper':>10}",
+            "-" * 70,
+        ]
+        for metric, interval in self.confidence_intervals.items():
+            lines.append(
+                f"{metric:<12} {interval.estimate:>10.3f} {interval.lower:>10.3f} {interval.upper:>10.3f}"
+            )
+        lines.append("-" * 70)
+        lines.append(f"Best F1 threshold: {self.curve.best_threshold('f1'):.3f}")
+        lines.append(f"Average precision: {self.curve.average_precision:.3f}")
+        lines.append("=" * 70)
+        return "\n".join(lines)
+
+
+def evaluate(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    slices: Optional[pd.DataFrame] = None,
+    threshold: float = 0.5,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    random_state: int = 42,
+) -> EvaluationReport:
+    """
+    Evaluates predictions at every threshold, with bootstrap intervals and slices.
+
+    Arguments:
+        y_true: Binary labels.
+        y_score: Predicted probabilities of the positive class.
+        slices: Optional DataFrame aligned with y_true whose columns define slices.
+        threshold: Decision threshold for the point metrics.
+        n_resamples: Number of bootstrap resamples.
+        confidence: Confidence level of the intervals.
+        random_state: Random seed.
+
+    Returns:
+        EvaluationReport.
+    """
+    return EvaluationReport(
+        threshold=threshold,
+        curve=threshold_curve(y_true, y_score),
+        confidence_intervals=bootstrap_confidence_intervals(
+            y_true, y_score,
+            threshold=threshold,
+            n_resamples=n_resamples,
+            confidence=confidence,
+            random_state=random_state,
+        ),
+        slices=slice_metrics(y_true, y_score, slices, threshold) if slices is not None else pd.DataFrame(),
+    )
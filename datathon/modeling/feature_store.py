@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from datathon.database.client import DuckDBClient
+from datathon.modeling.registry import ModelRegistry
+from datathon.modeling.train import FEATURE_COLUMNS, TrainedModel
+
+
+FEATURE_STORE_TABLE = 'refined.student_features'
+SCORES_TABLE = 'refined.student_scores'
+
+
+@dataclass
+class StudentFeatures:
+    """Model-ready features of one student, with the model score if available."""
+    ra: str
+    year: int
+    features: np.ndarray
+    score: Optional[float]
+
+
+def score_feature_store(db: DuckDBClient, trained: TrainedModel) -> int:
+    """
+    Pre-scores every row of the feature store with a registered model version.
+
+    Scores are stored in refined.student_scores keyed on (ra, year, model_version),
+    so a FeatureStore lookup for that version is a single fetch.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        trained: A model loaded from the ModelRegistry (its version is the key).
+
+    Returns:
+        The number of rows scored.
+    """
+    if trained.version is None:
+        raise ValueError("Only registered model versions can be pre-scored")
+
+    columns = ', '.join(trained.feature_columns)
+    features = db.conn.execute(f"SELECT ra, year, {columns} FROM {FEATURE_STORE_TABLE};").df()
+    scores = features[['ra', 'year']].assign(
+        model_version=trained.version,
+        score=trained.predict_proba_array(features[trained.feature_columns].to_numpy(dtype=float)),
+    )
+
+    db.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SCORES_TABLE} (
+            ra VARCHAR, year INTEGER, model_version VARCHAR, score DOUBLE
+        );
+    """)
+    db.conn.register('temp_table', scores)
+    db.conn.execute("BEGIN TRANSACTION;")
+    try:
+        db.execute_query(f"DELETE FROM {SCORES_TABLE} WHERE model_version = '{trained.version}';")
+        db.execute_query(f"INSERT INTO {SCORES_TABLE} SELECT * FROM temp_table ORDER BY ra, year;")
+        db.conn.execute("COMMIT;")
+    except Exception:
+        db.conn.execute("ROLLBACK;")
+        raise
+    finally:
+        db.conn.unregister('temp_table')
+    db.execute_query(f"CREATE INDEX IF NOT EXISTS student_scores_ra_idx ON {SCORES_TABLE} (ra);")
+    print(f"Pre-scored {len(scores)} students with model {trained.version}")
+    return len(scores)
+
+
+class FeatureStore:
+    """
+    Read-through cache over refined.student_features for per-student scoring.
+
+    Each lookup scores with the registry's current model, so promotions are
+    picked up without restarting, and cached entries are keyed on the model
+    version. Lookups hit DuckDB through the ra index on a miss, fetching the
+    pre-computed score of the current version along with the features (rows
+    that were not pre-scored are scored on the spot), and are served from an
+    in-process LRU afterwards. The cache is dropped whenever the version stamp
+    of the features or scores changes, checked at most once per refresh interval.
+    """
+
+    def __init__(
+        self,
+        db: DuckDBClient,
+        registry: Optional[ModelRegistry] = None,
+        cache_size: int = 10_000,
+        refresh_interval: float = 1.0,
+    ):
+        self.db = db
+        self.registry = registry
+        self.cache_size = cache_size
+        self.refresh_interval = refresh_interval
+
+        self._cache: OrderedDict[tuple, Optional[StudentFeatures]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions: Optional[dict[str, str]] = None
+        self._checked_at = float('-inf')
+        self._queries: dict[tuple[str, ...], tuple[str, str, bool]] = {}
+
+    def _check_version(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = now
+        versions = self.db.table_versions([FEATURE_STORE_TABLE, SCORES_TABLE])
+        if versions != self._versions:
+            self._versions = versions
+            self._cache.clear()
+            # The scores table may have been created since the queries were built
+            self._queries.clear()
+
+    def _scores_table_exists(self) -> bool:
+        schema, name = SCORES_TABLE.split('.')
+        return bool(self.db.conn.execute(
+            "SELECT count(*) FROM duckdb_tables() WHERE schema_name = ? AND table_name = ?;",
+            [schema, name],
+        ).fetchone()[0])
+
+    def _lookup_queries(self, feature_columns: list[str]) -> tuple[str, str, bool]:
+        """Latest-year and given-year lookup queries, and whether they join the scores."""
+        key = tuple(feature_columns)
+        if key not in self._queries:
+            columns = ', '.join(f"f.{col}" for col in feature_columns)
+            if self._scores_table_exists():
+                select = (
+                    f"SELECT f.ra, f.year, {columns}, s.score FROM {FEATURE_STORE_TABLE} f "
+                    f"LEFT JOIN {SCORES_TABLE} s "
+                    f"ON s.ra = f.ra AND s.year = f.year AND s.model_version = ?"
+                )
+                joins_scores = True
+            else:
+                select = f"SELECT f.ra, f.year, {columns}, NULL AS score FROM {FEATURE_STORE_TABLE} f"
+                joins_scores = False
+            self._queries[key] = (
+                f"{select} WHERE f.ra = ? ORDER BY f.year DESC LIMIT 1;",
+                f"{select} WHERE f.ra = ? AND f.year = ?;",
+                joins_scores,
+            )
+        return self._queries[key]
+
+    def lookup(self, ra: str, year: Optional[int] = None) -> Optional[StudentFeatures]:
+        """
+        Fetches the features (and score) of a student.
+
+        Arguments:
+            ra: The student's registration number.
+            year: The indicator year; defaults to the student's latest year.
+
+        Returns:
+            StudentFeatures, or None if the student is not in the store.
+        """
+        model = self.registry.current() if self.registry is not None else None
+        version = model.version if model is not None else None
+        feature_columns = model.feature_columns if model is not None else FEATURE_COLUMNS
+
+        key = (ra, year, version)
+        with self._lock:
+            self._check_version()
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            latest_query, year_query, joins_scores = self._lookup_queries(feature_columns)
+            parameters = [version] if joins_scores else []
+            if year is None:
+                row = self.db.conn.execute(latest_query, [*parameters, ra]).fetchone()
+            else:
+                row = self.db.conn.execute(year_query, [*parameters, ra, year]).fetchone()
+
+            entry = None
+            if row is not None:
+                features = np.array(row[2:-1], dtype=float)
+                score = row[-1]
+                if model is not None and score is None:
+                    score = float(model.predict_proba_array(features.reshape(1, -1))[0])
+                entry = StudentFeatures(ra=row[0], year=row[1], features=features, score=score)
+
+            self._cache[key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return entry
+
+    def score(self, ra: str, year: Optional[int] = None) -> Optional[float]:
+        """
+        Probability of lag worsening for a student, from the current model.
+
+        Arguments:
+            ra: The student's registration number.
+            year: The indicator year; defaults to the student's latest year.
+
+        Returns:
+            The score, or None if the student is not in the store.
+        """
+        if self.registry is None:
+            raise ValueError("FeatureStore was created without a model registry")
+        entry = self.lookup(ra, year)
+        return entry.score if entry is not None else None
+
+    def clear(self) -> None:
+        """Drops every cached lookup."""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import threading
+from typing import BinaryIO, Optional
+
+from datathon.modeling.train import TrainedModel
+
+
+class ModelRegistry:
+    """
+    Local registry of versioned models with a promoted "current" pointer.
+
+    Layout:
+        {root}/vNNNN.pkl      one pickled TrainedModel per version
+        {root}/vNNNN.json     metadata of the version, written once it is complete
+        {root}/index.json     the current pointer
+
+    Version numbers are claimed by creating vNNNN.pkl exclusively, and each
+    version has its own metadata file, so training processes can register
+    concurrently without overwriting each other.
+
+    Models are loaded lazily and kept in an LRU of loaded versions, so each
+    version is unpickled at most once per process. current() re-reads the index
+    when it changes on disk, which lets long-running scorers hot-swap to a newly
+    promoted version without restarting.
+    """
+
+    def __init__(self, root: str | Path = 'models/registry', max_loaded: int = 2):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / 'index.json'
+        self.max_loaded = max_loaded
+
+        self._loaded: OrderedDict[str, TrainedModel] = OrderedDict()
+        self._lock = threading.RLock()
+        self._index: Optional[dict] = None
+        self._index_mtime: Optional[int] = None
+
+    def _read_index(self) -> dict:
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {'current': None}
+        if mtime != self._index_mtime:
+            with open(self.index_path, 'r') as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+        return self._index
+
+    def _write_json(self, path: Path, content: dict) -> None:
+        # Write-then-rename (through a unique temp file) so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _metadata_path(self, version: str) -> Path:
+        return self.root / f'{version}.json'
+
+    def versions(self) -> list[dict]:
+        """
+        Lists registered versions.
+
+        Returns:
+            Metadata of each version, oldest first.
+        """
+        entries = []
+        for path in sorted(self.root.glob('v[0-9]*.json')):
+            with open(path, 'r') as f:
+                entries.append(json.load(f))
+        return entries
+
+    @property
+    def current_version(self) -> Optional[str]:
+        """The promoted version, or None if nothing was promoted yet."""
+        with self._lock:
+            return self._read_index()['current']
+
+    def _claim_version(self) -> tuple[str, BinaryIO]:
+        """Creates the next free vNNNN.pkl exclusively and returns it open for writing."""
+        numbers = [int(path.stem[1:]) for path in self.root.glob('v[0-9]*.pkl')]
+        number = max(numbers, default=0) + 1
+        while True:
+            version = f"v{number:04d}"
+            try:
+                return version, open(self.root / f'{version}.pkl', 'xb')
+            except FileExistsError:
+                number += 1
+
+    def register(self, trained: TrainedModel, promote: bool = False) -> str:
+        """
+        Saves a model as a new version.
+
+        Arguments:
+            trained: The model to register.
+            promote: Whether to make it the current version.
+
+        Returns:
+            The new version identifier.
+        """
+        version, f = self._claim_version()
+        with f:
+            pickle.dump(trained, f)
+
+        # The version becomes visible once its metadata exists
+        self._write_json(self._metadata_path(version), {
+            'version': version,
+            'file': f'{version}.pkl',
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'feature_columns': list(trained.feature_columns),
+            'metrics': {k: float(v) for k, v in asdict(trained.metrics).items()},
+        })
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version: str) -> None:
+        """
+        Points "current" at an existing version.
+
+        Arguments:
+            version: The version to promote.
+        """
+        if not self._metadata_path(version).exists():
+            raise KeyError(f"Unknown model version: {version}")
+        with self._lock:
+            self._write_json(self.index_path, {'current': version})
+
+    def load(self, version: str) -> TrainedModel:
+        """
+        Returns a version, unpickling it only if it is not already loaded.
+
+        Arguments:
+            version: The version to load.
+
+        Returns:
+            The TrainedModel.
+        """
+        with self._lock:
+            if version in self._loaded:
+                self._loaded.move_to_end(version)
+                return self._loaded[version]
+
+            if not self._metadata_path(version).exists():
+                raise KeyError(f"Unknown model version: {version}")
+            trained = TrainedModel.load(self.root / f'{version}.pkl')
+            trained.version = version
+
+            self._loaded[version] = trained
+            current = self._read_index()['current']
+            # Evict least recently used versions, but never the current one
+            for loaded_version in list(self._loaded):
+                if len(self._loaded) <= self.max_loaded:
+                    break
+                if loaded_version not in (current, version):
+                    del self._loaded[loaded_version]
+            return trained
+
+    def current(self) -> TrainedModel:
+        """
+        Returns the promoted model, picking up promotions made by other processes.
+
+        Scorers should call this per request (it is a stat() when nothing changed)
+        rather than holding on to the returned model.
+
+        Returns:
+            The current TrainedModel.
+        """
+        version = self.current_version
+        if version is None:
+            raise LookupError("No model version has been promoted")
+        return self.load(version)
@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from typing import Optional
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+# Upper bounds (rows) of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+SCORING_STAGES = ('drift_monitoring', 'feature_assembly', 'preprocessing', 'model')
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing is a bisect and two additions."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[int]:
+        """Counts of observations <= each bucket bound, then the total (+Inf)."""
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+
+def _format_bound(bound: float) -> str:
+    return f"{bound:g}"
+
+
+class ScoringMetrics:
+    """
+    In-process scoring telemetry, labelled by model version.
+
+    Tracks per-call batch sizes, per-stage latencies (drift-sketch updates,
+    feature assembly, imputation/scaling, model evaluation), scored rows and
+    calls. All updates take a single lock, which keeps the per-call overhead to
+    a few microseconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: dict[tuple[str, str], Histogram] = {}
+        self._batch_size: dict[str, Histogram] = {}
+        self._rows: dict[str, int] = {}
+        self._calls: dict[str, int] = {}
+        self._scoring_seconds: dict[str, float] = {}
+
+    def observe(self, model_version: Optional[str], rows: int, **stage_seconds: float) -> None:
+        """
+        Records one scoring call.
+
+        Arguments:
+            model_version: Version label of the model that scored the batch.
+            rows: Number of rows scored.
+            stage_seconds: Seconds spent in each of SCORING_STAGES.
+        """
+        version = model_version or 'unversioned'
+        with self._lock:
+            if version not in self._batch_size:
+                self._batch_size[version] = Histogram(BATCH_SIZE_BUCKETS)
+                self._rows[version] = 0
+                self._calls[version] = 0
+                self._scoring_seconds[version] = 0.0
+                for stage in SCORING_STAGES:
+                    self._latency[(stage, version)] = Histogram(LATENCY_BUCKETS)
+
+            self._batch_size[version].observe(rows)
+            self._rows[version] += rows
+            self._calls[version] += 1
+            for stage, seconds in stage_seconds.items():
+                self._latency[(stage, version)].observe(seconds)
+                self._scoring_seconds[version] += seconds
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Summarizes the metrics per model version.
+
+        Returns:
+            For each version: calls, rows, rows per second of scoring time, mean
+            batch size and mean latency per stage (seconds).
+        """
+        with self._lock:
+            return {
+                version: {
+                    'calls': self._calls[version],
+                    'rows': self._rows[version],
+                    'rows_per_second': (
+                        self._rows[version] / self._scoring_seconds[version]
+                        if self._scoring_seconds[version] > 0 else 0.0
+                    ),
+                    'mean_batch_size': self._rows[version] / self._calls[version],
+                    'mean_latency_seconds': {
+                        stage: (
+                            self._latency[(stage, version)].sum / self._latency[(stage, version)].count
+                            if self._latency[(stage, version)].count else 0.0
+                        )
+                        for stage in SCORING_STAGES
+                    },
+                }
+                for version in self._calls
+            }
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text.
+        """
+        lines = []
+        with self._lock:
+            lines.append("# HELP datathon_scoring_latency_seconds Scoring latency per stage.")
+            lines.append("# TYPE datathon_scoring_latency_seconds histogram")
+            for (stage, version), histogram in self._latency.items():
+                labels = f'stage="{stage}",model_version="{version}"'
+                lines.extend(self._render_histogram('datathon_scoring_latency_seconds', labels, histogram))
+
+            lines.append("# HELP datathon_scoring_batch_size Rows per scoring call.")
+            lines.append("# TYPE datathon_scoring_batch_size histogram")
+            for version, histogram in self._batch_size.items():
+                labels = f'model_version="{version}"'
+                lines.extend(self._render_histogram('datathon_scoring_batch_size', labels, histogram))
+
+            lines.append("# HELP datathon_scoring_rows_total Rows scored.")
+            lines.append("# TYPE datathon_scoring_rows_total counter")
+            for version, rows in self._rows.items():
+                lines.append(f'datathon_scoring_rows_total{{model_version="{version}"}} {rows}')
+
+            lines.append("# HELP datathon_scoring_calls_total Scoring calls.")
+            lines.append("# TYPE datathon_scoring_calls_total counter")
+            for version, calls in self._calls.items():
+                lines.append(f'datathon_scoring_calls_total{{model_version="{version}"}} {calls}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(name: str, labels: str, histogram: Histogram) -> list[str]:
+        bounds = [_format_bound(bound) for bound in histogram.buckets] + ['+Inf']
+        lines = [
+            f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+            for bound, count in zip(bounds, histogram.cumulative_counts())
+        ]
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return lines
+
+    def reset(self) -> None:
+        """Drops all recorded metrics."""
+        with self._lock:
+            self._latency.clear()
+            self._batch_size.clear()
+            self._rows.clear()
+            self._calls.clear()
+            self._scoring_seconds.clear()
+
+
+SCORING_METRICS = ScoringMetrics()
+
+
+def serve_metrics(port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    Serves SCORING_METRICS at http://{host}:{port}/metrics from a daemon thread.
+
+    Arguments:
+        port: Port to listen on.
+        host: Interface to bind; local-only by default.
+
+    Returns:
+        The running server (call shutdown() to stop it).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = SCORING_METRICS.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
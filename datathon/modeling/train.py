@@ -1,13 +1,21 @@
 from dataclasses import dataclass
 from pathlib import Path
 import pickle
+import time
+from typing import Literal, Optional
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import cross_val_score, StratifiedKFold, train_test_split
 from sklearn.preprocessing import StandardScaler
 
+from datathon.modeling.drift import DriftMonitor
+from datathon.modeling.evaluation import EvaluationReport, evaluate
+from datathon.modeling.telemetry import SCORING_METRICS
+from datathon.preprocessing.temporal import TEMPORAL_FEATURE_COLUMNS  # selectable via train(feature_columns=...)
+
 
 # Features based on PEDE framework
 FEATURE_COLUMNS = [
@@ -22,6 +30,13 @@ FEATURE_COLUMNS = [
     'age',   # Student age
 ]
 
+# Columns evaluation metrics are sliced by
+SLICE_COLUMNS = ['year', 'stone']
+
+# Model engines; hist_gradient_boosting handles NaNs natively and needs no scaling
+ModelEngine = Literal['random_forest', 'hist_gradient_boosting']
+MODEL_ENGINES: tuple[ModelEngine, ...] = ('random_forest', 'hist_gradient_boosting')
+
 
 @dataclass
 class ModelMetrics:
@@ -40,16 +55,64 @@ class ModelMetrics:
 class TrainedModel:
     """Trained model container."""
 
-    model: RandomForestClassifier
-    scaler: StandardScaler
+    model: RandomForestClassifier | HistGradientBoostingClassifier
+    scaler: Optional[StandardScaler]
     feature_columns: list[str]
     metrics: ModelMetrics
+    drift_monitor: Optional[DriftMonitor] = None
+    evaluation: Optional[EvaluationReport] = None
+    version: Optional[str] = None
+    engine: ModelEngine = 'random_forest'
+
+    def __getstate__(self) -> dict:
+        # The live scoring window stays in this process; saved models carry only the reference profile
+        state = self.__dict__.copy()
+        if self.drift_monitor is not None:
+            state['drift_monitor'] = self.drift_monitor.fresh()
+        return state
 
     def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
-        """Predict probability of lag worsening."""
-        X = df[self.feature_columns].fillna(df[self.feature_columns].median())
-        X_scaled = self.scaler.transform(X)
-        return self.model.predict_proba(X_scaled)[:, 1]
+        """Predict probability of lag worsening; scored inputs feed the drift monitor."""
+        start = time.perf_counter()
+        if self.drift_monitor is not None:
+            self.drift_monitor.update(df)
+        monitored = time.perf_counter()
+        X = df[self.feature_columns]
+        assembled = time.perf_counter()
+        if self.scaler is not None:
+            X = X.fillna(X.median())
+        return self._score(
+            X.to_numpy(dtype=float),
+            feature_seconds=assembled - monitored,
+            imputation_started=assembled,
+            drift_seconds=monitored - start,
+        )
+
+    def predict_proba_array(self, X: np.ndarray) -> np.ndarray:
+        """Predict probability of lag worsening from an unscaled, already-imputed feature matrix."""
+        return self._score(X, feature_seconds=0.0, imputation_started=time.perf_counter())
+
+    def _score(
+        self,
+        X: np.ndarray,
+        feature_seconds: float,
+        imputation_started: float,
+        drift_seconds: float = 0.0,
+    ) -> np.ndarray:
+        # Same arithmetic as scaler.transform, without its per-call validation overhead
+        if self.scaler is not None:
+            X = (X - self.scaler.mean_) / self.scaler.scale_
+        scaled = time.perf_counter()
+        proba = self.model.predict_proba(X)[:, 1]
+        SCORING_METRICS.observe(
+            self.version,
+            len(X),
+            drift_monitoring=drift_seconds,
+            feature_assembly=feature_seconds,
+            preprocessing=scaled - imputation_started,
+            model=time.perf_counter() - scaled,
+        )
+        return proba
 
     def predict(self, df: pd.DataFrame, threshold: float = 0.5) -> np.ndarray:
         """Predict binary outcome."""
@@ -62,6 +125,14 @@ class TrainedModel:
         with open(path, 'wb') as f:
             pickle.dump(self, f)
 
+    def prepare_features(self, df: pd.DataFrame) -> np.ndarray:
+        """Build the model-ready feature matrix (imputed and scaled where the engine needs it)."""
+        X = df[self.feature_columns]
+        if self.scaler is None:
+            return X.to_numpy(dtype=float)
+        X = X.fillna(X.median()).to_numpy(dtype=float)
+        return (X - self.scaler.mean_) / self.scaler.scale_
+
     @classmethod
     def load(cls, path: str | Path) -> 'TrainedModel':
         """Load model from disk."""
@@ -69,7 +140,81 @@ class TrainedModel:
             return pickle.load(f)
 
 
-def train(df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42) -> TrainedModel:
+def build_estimator(
+    engine: ModelEngine,
+    random_state: int = 42,
+) -> RandomForestClassifier | HistGradientBoostingClassifier:
+    """
+    Build an unfitted classifier for a model engine.
+
+    Arguments:
+        engine: 'random_forest' or 'hist_gradient_boosting'.
+        random_state: Random seed.
+
+    Returns:
+        The classifier.
+    """
+    if engine == 'random_forest':
+        # Regularized to reduce overfitting
+        return RandomForestClassifier(
+            n_estimators=100,
+            max_depth=5,
+            min_samples_leaf=10,
+            class_weight='balanced',
+            random_state=random_state,
+            n_jobs=-1,
+        )
+    if engine == 'hist_gradient_boosting':
+        # Early stopping on an internal validation split picks the number of iterations
+        return HistGradientBoostingClassifier(
+            learning_rate=0.1,
+            max_iter=500,
+            max_leaf_nodes=15,
+            min_samples_leaf=10,
+            l2_regularization=1.0,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=10,
+            class_weight='balanced',
+            random_state=random_state,
+        )
+    raise ValueError(f"Unknown model engine: {engine}")
+
+
+def prepare_training_matrix(
+    df: pd.DataFrame,
+    feature_columns: list[str],
+    engine: ModelEngine,
+) -> tuple[np.ndarray, Optional[StandardScaler]]:
+    """
+    Build the training feature matrix for a model engine.
+
+    The random forest gets median-imputed, standardized features. Histogram
+    gradient boosting uses the raw features, with NaNs routed natively.
+
+    Arguments:
+        df: DataFrame with student data.
+        feature_columns: Features to train on.
+        engine: 'random_forest' or 'hist_gradient_boosting'.
+
+    Returns:
+        The feature matrix and the fitted scaler (None when not scaled).
+    """
+    if engine == 'hist_gradient_boosting':
+        return df[feature_columns].to_numpy(dtype=float), None
+
+    X = df[feature_columns].fillna(df[feature_columns].median())
+    scaler = StandardScaler()
+    return scaler.fit_transform(X), scaler
+
+
+def train(
+    df: pd.DataFrame,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    feature_columns: Optional[list[str]] = None,
+    engine: ModelEngine = 'random_forest',
+) -> TrainedModel:
     """
     Train classification model.
 
@@ -77,6 +222,9 @@ def train(df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42) -> T
         df: DataFrame with student data.
         test_size: Fraction for test set.
         random_state: Random seed.
+        feature_columns: Features to train on. Defaults to FEATURE_COLUMNS; add
+            TEMPORAL_FEATURE_COLUMNS to include multi-year trajectory features.
+        engine: 'random_forest' or 'hist_gradient_boosting'.
 
     Returns:
         TrainedModel with metrics.
@@ -85,28 +233,21 @@ def train(df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42) -> T
         accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
     )
 
-    # Prepare data
-    X = df[FEATURE_COLUMNS].fillna(df[FEATURE_COLUMNS].median())
-    y = (df['lag_next'] > df['lag_current']).astype(int)
+    if feature_columns is None:
+        feature_columns = FEATURE_COLUMNS
 
-    # Scale
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Prepare data (imputed and scaled only for engines that need it)
+    X_model, scaler = prepare_training_matrix(df, feature_columns, engine)
+    y = (df['lag_next'] > df['lag_current']).astype(int)
 
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=test_size, random_state=random_state, stratify=y
+    # Split (positions are kept to slice the test set by year and stone)
+    X_train, X_test, y_train, y_test, _, test_positions = train_test_split(
+        X_model, y, np.arange(len(df)),
+        test_size=test_size, random_state=random_state, stratify=y
     )
 
-    # Train (regularized to reduce overfitting)
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=5,
-        min_samples_leaf=10,
-        class_weight='balanced',
-        random_state=random_state,
-        n_jobs=-1,
-    )
+    # Train
+    model = build_estimator(engine, random_state)
     model.fit(X_train, y_train)
 
     # Evaluate
@@ -115,7 +256,7 @@ def train(df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42) -> T
 
     # Cross-validation
     cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=random_state)
-    cv_scores = cross_val_score(model, X_scaled, y, cv=cv, scoring='f1')
+    cv_scores = cross_val_score(model, X_model, y, cv=cv, scoring='f1')
 
     metrics = ModelMetrics(
         accuracy=accuracy_score(y_test, y_pred),
@@ -127,17 +268,45 @@ def train(df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42) -> T
         cv_f1_std=cv_scores.std(),
     )
 
+    # Threshold sweep, bootstrap intervals and slice metrics on the test set
+    slice_columns = [col for col in SLICE_COLUMNS if col in df.columns]
+    evaluation = evaluate(
+        y_test.to_numpy(),
+        y_proba,
+        slices=df.iloc[test_positions][slice_columns],
+        random_state=random_state,
+    )
+
     return TrainedModel(
         model=model,
         scaler=scaler,
-        feature_columns=FEATURE_COLUMNS,
+        feature_columns=feature_columns,
         metrics=metrics,
+        drift_monitor=DriftMonitor.from_training(df, feature_columns),
+        evaluation=evaluation,
+        engine=engine,
     )
 
 
-def get_feature_importance(trained: TrainedModel) -> pd.DataFrame:
-    """Get feature importance ranking."""
+def get_feature_importance(trained: TrainedModel, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Get feature importance ranking.
+
+    Engines without impurity importances (hist_gradient_boosting) use permutation
+    importance on the F1 score, which requires labelled data in df.
+    """
+    if hasattr(trained.model, 'feature_importances_'):
+        importance = trained.model.feature_importances_
+    elif df is None:
+        raise ValueError(f"{trained.engine} needs df to compute permutation importance")
+    else:
+        y = (df['lag_next'] > df['lag_current']).astype(int)
+        importance = permutation_importance(
+            trained.model, trained.prepare_features(df), y,
+            scoring='f1', n_repeats=5, random_state=42, n_jobs=-1,
+        ).importances_mean
+
     return pd.DataFrame({
         'feature': trained.feature_columns,
-        'importance': trained.model.feature_importances_,
+        'importance': importance,
     }).sort_values('importance', ascending=False)
@@ -0,0 +1,111 @@
+from typing import Optional
+
+from datathon.database.client import DuckDBClient
+from datathon.database.delta import ChangeSet, WriteMode, write_table
+from datathon.preprocessing.mapping import (
+    COLUMN_MAPPINGS,
+    COLUMNS_TO_DROP,
+    HISTORY_CATEGORICAL_COLUMNS,
+    HISTORY_COLUMN_OVERRIDES,
+    HISTORY_NUMERIC_COLUMNS,
+)
+
+
+def history_columns(year: int) -> dict[str, Optional[str]]:
+    """
+    Resolves the refined.data_{year} column holding each history indicator.
+
+    Arguments:
+        year: The year of the refined table.
+
+    Returns:
+        A mapping of indicator name to year-specific column, or None when the
+        indicator is not available that year.
+    """
+    refined_columns = set(COLUMN_MAPPINGS[year].values()) - COLUMNS_TO_DROP[year]
+    overrides = HISTORY_COLUMN_OVERRIDES.get(year, {})
+
+    columns = {}
+    for indicator in HISTORY_CATEGORICAL_COLUMNS + HISTORY_NUMERIC_COLUMNS:
+        column = overrides.get(indicator, f"{indicator}_{year}")
+        columns[indicator] = column if column in refined_columns else None
+    return columns
+
+
+def history_year_query(year: int) -> str:
+    """
+    Builds the query reshaping refined.data_{year} into long format.
+
+    Categorical indicators are kept as text and numeric indicators are cast to
+    DOUBLE, so that every year shares the same schema.
+
+    Arguments:
+        year: The year of the refined table.
+
+    Returns:
+        A SELECT producing (ra, year, indicator columns...) rows sorted by ra.
+    """
+    columns = history_columns(year)
+    select = [f"ra_{year} AS ra", f"{year} AS year"]
+    for indicator in HISTORY_CATEGORICAL_COLUMNS:
+        column = columns[indicator]
+        select.append(f"CAST({column if column else 'NULL'} AS VARCHAR) AS {indicator}")
+    for indicator in HISTORY_NUMERIC_COLUMNS:
+        column = columns[indicator]
+        select.append(f"TRY_CAST({column if column else 'NULL'} AS DOUBLE) AS {indicator}")
+
+    select_list = ",\n    ".join(select)
+    return f"SELECT\n    {select_list}\nFROM refined.data_{year}\nORDER BY ra"
+
+
+def build_student_history(
+    db: DuckDBClient,
+    years: list[int],
+    mode: WriteMode = 'replace',
+) -> Optional[ChangeSet]:
+    """
+    Stores every refined year in the long-format refined.student_history table.
+
+    Rows are kept sorted by (year, ra) in both modes, so that DuckDB's zone maps
+    can skip row groups on year-range and student scans.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        years: The years of the refined.data_{year} tables to include.
+        mode: 'replace' rewrites the table, 'upsert' applies only changed rows.
+
+    Returns:
+        The changeset in upsert mode, None otherwise.
+    """
+    union_query = "\n\nUNION ALL\n\n".join(
+        f"({history_year_query(year)})" for year in sorted(years)
+    )
+    return write_table(
+        db,
+        'refined.student_history',
+        union_query,
+        keys=['ra', 'year'],
+        mode=mode,
+        order_by=['year', 'ra'],
+    )
+
+
+def append_student_history_year(db: DuckDBClient, year: int) -> None:
+    """
+    Adds (or replaces) a single year in refined.student_history.
+
+    A new year is a plain append: no schema change and no rewrite of earlier
+    years. Appending years in increasing order keeps the table sorted by (year, ra).
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        year: The year of the refined table to append.
+    """
+    db.conn.execute("BEGIN TRANSACTION;")
+    try:
+        db.execute_query(f"DELETE FROM refined.student_history WHERE year = {year};")
+        db.execute_query(f"INSERT INTO refined.student_history {history_year_query(year)};")
+        db.conn.execute("COMMIT;")
+    except Exception:
+        db.conn.execute("ROLLBACK;")
+        raise
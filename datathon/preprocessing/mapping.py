@@ -265,3 +265,45 @@ COLUMNS_TO_DROP_2024 = {
     "english_2024",
     "ipp_2024",
 }
+
+COLUMN_MAPPINGS = {
+    2022: COLUMN_MAPPING_2022,
+    2023: COLUMN_MAPPING_2023,
+    2024: COLUMN_MAPPING_2024,
+}
+
+COLUMNS_TO_DROP = {
+    2022: COLUMNS_TO_DROP_2022,
+    2023: COLUMNS_TO_DROP_2023,
+    2024: COLUMNS_TO_DROP_2024,
+}
+
+# Indicators stored in the long-format refined.student_history table
+HISTORY_CATEGORICAL_COLUMNS = [
+    "gender",
+    "education_institution",
+    "stone",
+]
+
+HISTORY_NUMERIC_COLUMNS = [
+    "age",
+    "inde",
+    "iaa",
+    "ieg",
+    "ips",
+    "ida",
+    "math",
+    "portuguese",
+    "ipv",
+    "ian",
+    "lag",
+]
+
+# Indicators whose refined column is not named {indicator}_{year}
+HISTORY_COLUMN_OVERRIDES = {
+    2022: {
+        "age": "age_22_2022",
+        "stone": "stone_22_2022",
+        "inde": "inde_22_2022",
+    },
+}
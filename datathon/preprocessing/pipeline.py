@@ -1,4 +1,17 @@
+import argparse
+from typing import Optional
+
+from pandas import DataFrame
+
 from datathon.database.client import DuckDBClient
+from datathon.database.delta import ChangeSet, WriteMode, write_table
+from datathon.database.export import export_refined_tables
+from datathon.database.sampling import create_sample_database
+from datathon.modeling.feature_store import score_feature_store
+from datathon.modeling.registry import ModelRegistry
+from datathon.modeling.train import FEATURE_COLUMNS
+from datathon.preprocessing.history import build_student_history
+from datathon.preprocessing.temporal import TEMPORAL_FEATURE_COLUMNS, build_student_trajectories
 from datathon.preprocessing.transformations import (
     detect_outliers_iqr,
     drop_columns,
@@ -11,14 +24,21 @@ from datathon.preprocessing.transformations import (
     standardize_gender,
     treat_outliers_iqr,
 )
+from datathon.preprocessing.validation import validate_cleaned_data
+
+DATABASE_PATH = 'data/duckdb/datathon.db'
+SAMPLE_DATABASE_PATH = 'data/duckdb/datathon_sample.db'
 
-def clean_and_store_refined_table(year: int, db: DuckDBClient) -> None:
+def clean_refined_table(year: int, db: DuckDBClient) -> DataFrame:
     """
-    Cleans the raw data for a given year and stores it as a refined table in the database.
+    Cleans the raw data for a given year.
 
     Arguments:
-        year: The year for which to clean and store the data.
+        year: The year for which to clean the data.
         db: An instance of the Database class to interact with the database.
+
+    Returns:
+        The cleaned data, with the refined column names.
     """
     # Fetch the raw data for the specified year
     raw_data = db.fetch_table(f'raw.data_{year}')
@@ -27,12 +47,52 @@ def clean_and_store_refined_table(year: int, db: DuckDBClient) -> None:
     cleaned_data = rename_columns(year, raw_data)
     cleaned_data = standardize_gender(year, cleaned_data)
     cleaned_data = standardize_education_institution(year, cleaned_data)
-    cleaned_data = drop_columns(year, cleaned_data)
+    return drop_columns(year, cleaned_data)
+
+def store_refined_table(
+    year: int,
+    cleaned_data: DataFrame,
+    db: DuckDBClient,
+    mode: WriteMode = 'replace',
+) -> Optional[ChangeSet]:
+    """
+    Stores cleaned data as the refined table of a year.
+
+    Arguments:
+        year: The year of the data.
+        cleaned_data: The output of clean_refined_table.
+        db: An instance of the Database class to interact with the database.
+        mode: 'replace' rewrites the table, 'upsert' applies only changed rows.
 
-    # Store the cleaned data back to the database
-    with open('data/queries/create_refined_table.sql', 'r') as f:
-        create_table_query = f.read().format(year=year)
-        db.execute_query(create_table_query, cleaned_data)
+    Returns:
+        The changeset in upsert mode, None otherwise.
+    """
+    return write_table(
+        db,
+        f'refined.data_{year}',
+        'SELECT * FROM temp_table',
+        keys=[f'ra_{year}'],
+        mode=mode,
+        df=cleaned_data,
+    )
+
+def clean_and_store_refined_table(
+    year: int,
+    db: DuckDBClient,
+    mode: WriteMode = 'replace',
+) -> Optional[ChangeSet]:
+    """
+    Cleans the raw data for a given year and stores it as a refined table in the database.
+
+    Arguments:
+        year: The year for which to clean and store the data.
+        db: An instance of the Database class to interact with the database.
+        mode: 'replace' rewrites the table, 'upsert' applies only changed rows.
+
+    Returns:
+        The changeset in upsert mode, None otherwise.
+    """
+    return store_refined_table(year, clean_refined_table(year, db), db, mode=mode)
 
 def merge_refined_tables(db: DuckDBClient) -> None:
     """
@@ -43,10 +103,14 @@ def merge_refined_tables(db: DuckDBClient) -> None:
     """
     with open('data/queries/merge_refined_tables.sql', 'r') as f:
         merge_query = f.read()
-        db.execute_query(merge_query)
+        write_table(db, 'refined.students', merge_query, keys=['ra', 'year'])
 
 
-def prepare_students_for_training(db: DuckDBClient) -> None:
+def prepare_students_for_training(
+    db: DuckDBClient,
+    mode: WriteMode = 'replace',
+    report_dir: str = "reports",
+) -> Optional[ChangeSet]:
     """
     Prepares the refined.students table for ML training:
     1. Standardize data types (convert to numeric, encode categoricals)
@@ -55,41 +119,165 @@ def prepare_students_for_training(db: DuckDBClient) -> None:
     4. Impute null values (median for numeric, mode for categorical)
     5. Round numeric columns to 2 decimal places
 
+    In upsert mode the merged rows are read straight from the merge query, so that
+    refined.students is written once and only its changed rows are applied.
+
     Arguments:
         db: An instance of the Database class to interact with the database.
+        mode: 'replace' rewrites the table, 'upsert' applies only changed rows.
+        report_dir: Directory for the outlier boxplots.
+
+    Returns:
+        The changeset in upsert mode, None otherwise.
     """
-    students = db.fetch_table('refined.students')
+    if mode == 'upsert':
+        with open('data/queries/merge_refined_tables.sql', 'r') as f:
+            students = db.execute_query(f.read())
+    else:
+        students = db.fetch_table('refined.students')
     students = standardize_dtypes(students)
 
     # Outlier detection, reporting, and treatment (BEFORE imputation)
     # This ensures we analyze actual data distribution, not imputed values
     outlier_report = detect_outliers_iqr(students)
     print(outlier_report)
-    render_outlier_boxplots(students, outlier_report, output_dir="reports")
+    render_outlier_boxplots(students, outlier_report, output_dir=report_dir)
     students = treat_outliers_iqr(students)
 
     students = impute_nulls(students)
     students = round_numeric_columns(students)
+    return write_table(
+        db,
+        'refined.students',
+        'SELECT * FROM temp_table',
+        keys=['ra', 'year'],
+        mode=mode,
+        df=students,
+    )
+
+def materialize_feature_store(db: DuckDBClient, mode: WriteMode = 'replace') -> Optional[ChangeSet]:
+    """
+    Materializes refined.student_features: one model-ready vector of
+    FEATURE_COLUMNS and TEMPORAL_FEATURE_COLUMNS per (ra, year) in the student
+    history, including the latest year, indexed for point lookups by ra.
+
+    Indicators get the same encoding, outlier treatment and imputation as the
+    training data in prepare_students_for_training.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        mode: 'replace' rewrites the table, 'upsert' applies only changed rows.
+
+    Returns:
+        The changeset in upsert mode, None otherwise.
+    """
+    with open('data/queries/select_student_features.sql', 'r') as f:
+        features = db.execute_query(f.read())
+    features = standardize_dtypes(features)
+    features = treat_outliers_iqr(features)
+    features = impute_nulls(features)
+    features = round_numeric_columns(features)
+
+    # Impute any remaining nulls with the column median so every stored vector is scoreable
+    feature_columns = FEATURE_COLUMNS + TEMPORAL_FEATURE_COLUMNS
+    features = features[['ra', 'year'] + feature_columns]
+    features = features.fillna(features[feature_columns].median())
+
+    changes = write_table(
+        db,
+        'refined.student_features',
+        'SELECT * FROM temp_table',
+        keys=['ra', 'year'],
+        mode=mode,
+        df=features,
+    )
     db.execute_query(
-        "CREATE OR REPLACE TABLE refined.students AS SELECT * FROM temp_table",
-        students
+        "CREATE INDEX IF NOT EXISTS student_features_ra_idx ON refined.student_features (ra);"
     )
+    return changes
 
-def run_pipeline() -> None:
+
+def run_pipeline(
+    mode: WriteMode = 'replace',
+    validate: bool = True,
+    sample: Optional[float] = None,
+    seed: int = 42,
+) -> None:
     """
     Runs the entire data preprocessing pipeline:
-    1. Clean and store refined tables for each year
-    2. Merge all refined tables into a single students table
-    3. Standardize data types and impute null values
+    1. Clean each year, validate it, then store the refined tables
+    2. Store all years in the long-format student history table
+    3. Compute multi-year trajectory features
+    4. Merge all refined tables into a single students table
+    5. Standardize data types and impute null values
+    6. Materialize the student feature store and pre-score it with the promoted model
+    7. Export the refined tables as partitioned Parquet
+
+    Arguments:
+        mode: 'replace' rewrites every table, 'upsert' applies only changed rows
+            keyed on ra and year, and prints each stage's changeset.
+        validate: Whether to run the data-quality checks, which stop the
+            pipeline before any table is written when an error-level check fails.
+        sample: If given, runs on a separate dev database holding this fraction of
+            students, sampled by ra hash and stratified on lag worsening, so the
+            same students are kept in every year.
+        seed: Salt of the sample hash.
     """
-    with DuckDBClient('data/duckdb/datathon.db') as db:
-        # Clean and store refined tables for each year
-        for year in range(2022, 2025):
-            clean_and_store_refined_table(year, db)
-        # Merge all refined tables into a single table
-        merge_refined_tables(db)
+    db_path, report_dir, export_dir = DATABASE_PATH, "reports", "data/parquet"
+    if sample is not None:
+        create_sample_database(DATABASE_PATH, SAMPLE_DATABASE_PATH, list(range(2022, 2025)), sample, seed)
+        db_path, report_dir, export_dir = SAMPLE_DATABASE_PATH, "reports/sample", "data/parquet_sample"
+
+    with DuckDBClient(db_path) as db:
+        # Clean every year, and fail fast on data-quality errors before anything is written
+        cleaned = {year: clean_refined_table(year, db) for year in range(2022, 2025)}
+        if validate:
+            validate_cleaned_data(db, cleaned)
+        # Store refined tables for each year
+        for year, cleaned_data in cleaned.items():
+            store_refined_table(year, cleaned_data, db, mode=mode)
+        # Reshape the per-year tables into one long-format history
+        build_student_history(db, years=list(range(2022, 2025)), mode=mode)
+        # Compute trajectory features across all years
+        build_student_trajectories(db)
+        # Merge all refined tables into a single table (upsert mode merges in memory)
+        if mode == 'replace':
+            merge_refined_tables(db)
         # Standardize types and impute nulls
-        prepare_students_for_training(db)
+        prepare_students_for_training(db, mode=mode, report_dir=report_dir)
+        # Materialize model-ready features for per-student lookups
+        materialize_feature_store(db, mode=mode)
+        # Pre-score them with the promoted model, so that lookups are a single fetch
+        registry = ModelRegistry()
+        if registry.current_version is not None:
+            score_feature_store(db, registry.current())
+        # Export refined tables for concurrent downstream readers
+        export_refined_tables(db, years=list(range(2022, 2025)), output_dir=export_dir)
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Run the data preprocessing pipeline.")
+    parser.add_argument(
+        '--mode',
+        choices=['replace', 'upsert'],
+        default='replace',
+        help="Rewrite every table, or apply only changed rows.",
+    )
+    parser.add_argument(
+        '--skip-validation',
+        action='store_true',
+        help="Do not run the data-quality checks.",
+    )
+    parser.add_argument(
+        '--sample',
+        type=float,
+        metavar='FRACTION',
+        help="Run on a deterministic, stratified sample of students (e.g. 0.1).",
+    )
+    parser.add_argument('--seed', type=int, default=42, help="Salt of the sample hash.")
+    args = parser.parse_args()
+    run_pipeline(
+        mode=args.mode,
+        validate=not args.skip_validation,
+        sample=args.sample,
+        seed=args.seed,
+    )
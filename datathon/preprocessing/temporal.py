@@ -0,0 +1,86 @@
+from typing import Optional
+
+from datathon.database.client import DuckDBClient
+from datathon.database.delta import write_table
+from datathon.preprocessing.transformations import STONE_ENCODING
+
+
+# Indicators whose trajectories are tracked across years
+TRAJECTORY_INDICATORS = ['ieg', 'iaa', 'ips', 'ida', 'ian', 'ipv', 'inde']
+
+# Number of years averaged by the rolling means (current year included)
+ROLLING_YEARS = 2
+
+TEMPORAL_FEATURE_COLUMNS = [
+    'years_observed',
+    *[
+        f'{indicator}_{suffix}'
+        for indicator in TRAJECTORY_INDICATORS
+        for suffix in ('delta', 'slope', 'rolling_mean')
+    ],
+    'stone_change',
+]
+
+
+# True on a student's first observed year
+_FIRST_YEAR = "row_number() OVER previous_years = 1"
+
+
+def _trajectory_query(since_year: int) -> str:
+    """
+    Builds the trajectory query from its template.
+
+    Deltas and slopes are 0 for a student's first observed year, so that they
+    mean "no change observed yet". Otherwise a missing value stays NULL (a delta
+    next to a missing year, a slope over fewer than two values), so that
+    NaN-aware engines still see the missingness.
+    """
+    stone_encoding = ", ".join(f"('{name}', {code})" for name, code in STONE_ENCODING.items())
+    trajectory_select = ",\n        ".join(
+        expression
+        for indicator in TRAJECTORY_INDICATORS
+        for expression in (
+            f"CASE WHEN {_FIRST_YEAR} THEN 0 ELSE {indicator} - lag({indicator}) OVER previous_years END "
+            f"AS {indicator}_delta",
+            f"CASE WHEN {_FIRST_YEAR} THEN 0 "
+            f"WHEN regr_count({indicator}, year) OVER history_to_date < 2 THEN NULL "
+            f"ELSE regr_slope({indicator}, year) OVER history_to_date END AS {indicator}_slope",
+            f"avg({indicator}) OVER rolling_window AS {indicator}_rolling_mean",
+        )
+    )
+    with open('data/queries/select_student_trajectories.sql', 'r') as f:
+        return f.read().format(
+            stone_encoding=stone_encoding,
+            trajectory_select=trajectory_select,
+            rolling_years=ROLLING_YEARS - 1,
+            since_year=since_year,
+            first_year=_FIRST_YEAR,
+        )
+
+
+def build_student_trajectories(db: DuckDBClient, since_year: Optional[int] = None) -> None:
+    """
+    Computes per-student trajectory features into refined.student_trajectories.
+
+    Features are computed set-wise with window functions over the long-format
+    refined.student_history table: year-over-year deltas, slopes over the history to date,
+    rolling means and stone transitions, one row per (ra, year).
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        since_year: If given, only rows for this year and later are recomputed
+            (windows still see earlier years); otherwise the table is rebuilt.
+    """
+    if since_year is None:
+        write_table(db, 'refined.student_trajectories', _trajectory_query(0), keys=['ra', 'year'])
+        return
+
+    query = _trajectory_query(since_year).strip().rstrip(';')
+    db.conn.execute("BEGIN TRANSACTION;")
+    try:
+        db.execute_query(f"DELETE FROM refined.student_trajectories WHERE year >= {since_year};")
+        db.execute_query(f"INSERT INTO refined.student_trajectories SELECT * FROM ({query});")
+        db.conn.execute("COMMIT;")
+    except Exception:
+        db.conn.execute("ROLLBACK;")
+        raise
@@ -0,0 +1,299 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Literal
+
+from pandas import DataFrame
+
+from datathon.database.client import DuckDBClient
+from datathon.preprocessing.history import history_columns
+from datathon.preprocessing.transformations import (
+    EDUCATION_INSTITUTION_ENCODING,
+    GENDER_ENCODING,
+    STONE_ENCODING,
+)
+
+
+Severity = Literal['error', 'warning']
+
+# Valid ranges of the numeric indicators (PEDE indices are on a 0-10 scale)
+INDICATOR_RANGES = {
+    'inde': (0, 10),
+    'iaa': (0, 10),
+    'ieg': (0, 10),
+    'ips': (0, 10),
+    'ida': (0, 10),
+    'ipv': (0, 10),
+    'ian': (0, 10),
+    'math': (0, 10),
+    'portuguese': (0, 10),
+    'age': (5, 30),
+    'lag': (-10, 10),
+}
+
+ALLOWED_CATEGORIES = {
+    'gender': list(GENDER_ENCODING),
+    'education_institution': list(EDUCATION_INSTITUTION_ENCODING),
+    'stone': list(STONE_ENCODING),
+}
+
+# Maximum share of nulls tolerated in an indicator column
+MAX_NULL_RATE = 0.5
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+@dataclass
+class Check(ABC):
+    """A data-quality rule compiled to one aggregate counting violating rows."""
+    column: str
+    severity: Severity
+
+    @abstractmethod
+    def aggregate(self) -> str:
+        """SQL aggregate counting the rows that violate the rule."""
+
+    def passed(self, violations: int, total: int) -> bool:
+        return violations == 0
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Short description of the rule for reports."""
+
+
+@dataclass
+class NumericCheck(Check):
+    """Non-null values must parse as numbers (instead of silently becoming NaN)."""
+
+    def aggregate(self) -> str:
+        return f"count(*) FILTER (WHERE {self.column} IS NOT NULL AND TRY_CAST({self.column} AS DOUBLE) IS NULL)"
+
+    def describe(self) -> str:
+        return "numeric"
+
+
+@dataclass
+class RangeCheck(Check):
+    """Numeric values must lie within [minimum, maximum]."""
+    minimum: float
+    maximum: float
+
+    def aggregate(self) -> str:
+        return (
+            f"count(*) FILTER (WHERE TRY_CAST({self.column} AS DOUBLE) "
+            f"NOT BETWEEN {self.minimum} AND {self.maximum})"
+        )
+
+    def describe(self) -> str:
+        return f"in [{self.minimum}, {self.maximum}]"
+
+
+@dataclass
+class AllowedValuesCheck(Check):
+    """Non-null values must be one of the encoded categories."""
+    values: list[str]
+
+    def aggregate(self) -> str:
+        allowed = ", ".join(_quote(value) for value in self.values)
+        return (
+            f"count(*) FILTER (WHERE {self.column} IS NOT NULL "
+            f"AND CAST({self.column} AS VARCHAR) NOT IN ({allowed}))"
+        )
+
+    def describe(self) -> str:
+        return f"one of {len(self.values)} categories"
+
+
+@dataclass
+class NullRateCheck(Check):
+    """The share of null values must not exceed max_rate."""
+    max_rate: float
+
+    def aggregate(self) -> str:
+        return f"count(*) FILTER (WHERE {self.column} IS NULL)"
+
+    def passed(self, violations: int, total: int) -> bool:
+        return total == 0 or violations / total <= self.max_rate
+
+    def describe(self) -> str:
+        return f"null rate <= {self.max_rate:.0%}"
+
+
+@dataclass
+class UniqueCheck(Check):
+    """Non-null values must be unique."""
+
+    def aggregate(self) -> str:
+        return f"count({self.column}) - count(DISTINCT {self.column})"
+
+    def describe(self) -> str:
+        return "unique"
+
+
+@dataclass
+class CheckResult:
+    """Outcome of one check."""
+    check: Check
+    violations: int
+    total: int
+    passed: bool
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of all checks on a table."""
+    table: str
+    total_records: int
+    results: list[CheckResult]
+
+    @property
+    def errors(self) -> list[CheckResult]:
+        return [r for r in self.results if not r.passed and r.check.severity == 'error']
+
+    @property
+    def warnings(self) -> list[CheckResult]:
+        return [r for r in self.results if not r.passed and r.check.severity == 'warning']
+
+    def __str__(self) -> str:
+        lines = [
+            "=" * 90,
+            f"DATA VALIDATION REPORT ({self.table})",
+            "=" * 90,
+            f"Total records: {self.total_records}",
+            f"Checks: {len(self.results)}, errors: {len(self.errors)}, warnings: {len(self.warnings)}",
+            "",
+            f"{'Column':<34} {'Rule':<26} {'Severity':<9} {'Violations':>10} {'Status':>7}",
+            "-" * 90,
+        ]
+        for result in self.results:
+            status = 'ok' if result.passed else 'FAIL'
+            lines.append(
+                f"{result.check.column:<34} {result.check.describe():<26} "
+                f"{result.check.severity:<9} {result.violations:>10} {status:>7}"
+            )
+        lines.append("=" * 90)
+        return "\n".join(lines)
+
+
+class DataValidationError(Exception):
+    """Raised when error-severity checks fail."""
+
+    def __init__(self, reports: list[ValidationReport]):
+        self.reports = reports
+        failed = [
+            f"{report.table}.{result.check.column} ({result.check.describe()}): {result.violations} violations"
+            for report in reports
+            for result in report.errors
+        ]
+        super().__init__("Data validation failed:\n  " + "\n  ".join(failed))
+
+
+def default_checks(year: int) -> list[Check]:
+    """
+    Builds the standard checks for refined.data_{year}.
+
+    Arguments:
+        year: The year of the refined table.
+
+    Returns:
+        A list of checks over the year-specific columns.
+    """
+    ra_column = f"ra_{year}"
+    checks: list[Check] = [
+        NullRateCheck(ra_column, 'error', max_rate=0.0),
+        UniqueCheck(ra_column, 'error'),
+    ]
+
+    for indicator, column in history_columns(year).items():
+        if column is None:
+            continue
+        checks.append(NullRateCheck(column, 'warning', max_rate=MAX_NULL_RATE))
+        if indicator in ALLOWED_CATEGORIES:
+            checks.append(AllowedValuesCheck(column, 'error', values=ALLOWED_CATEGORIES[indicator]))
+        if indicator in INDICATOR_RANGES:
+            minimum, maximum = INDICATOR_RANGES[indicator]
+            checks.append(NumericCheck(column, 'warning'))
+            checks.append(RangeCheck(column, 'error', minimum=minimum, maximum=maximum))
+    return checks
+
+
+def validate_table(db: DuckDBClient, table: str, checks: list[Check]) -> ValidationReport:
+    """
+    Runs all checks on a table in a single aggregate scan.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        table: The table to validate.
+        checks: The checks to run.
+
+    Returns:
+        ValidationReport with the outcome of every check.
+    """
+    aggregates = ",\n    ".join(
+        f"{check.aggregate()} AS check_{i}" for i, check in enumerate(checks)
+    )
+    row = db.conn.execute(f"SELECT\n    count(*) AS total,\n    {aggregates}\nFROM {table};").fetchone()
+    total = int(row[0])
+
+    results = [
+        CheckResult(
+            check=check,
+            violations=int(violations),
+            total=total,
+            passed=check.passed(int(violations), total),
+        )
+        for check, violations in zip(checks, row[1:])
+    ]
+    return ValidationReport(table=table, total_records=total, results=results)
+
+
+def _raise_on_errors(reports: list[ValidationReport]) -> list[ValidationReport]:
+    for report in reports:
+        print(report)
+    if any(report.errors for report in reports):
+        raise DataValidationError(reports)
+    return reports
+
+
+def validate_refined_tables(db: DuckDBClient, years: list[int]) -> list[ValidationReport]:
+    """
+    Validates every stored refined.data_{year} table and fails fast on errors.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        years: The years to validate.
+
+    Returns:
+        The validation reports (when no error-severity check failed).
+    """
+    reports = [
+        validate_table(db, f'refined.data_{year}', default_checks(year))
+        for year in years
+    ]
+    return _raise_on_errors(reports)
+
+
+def validate_cleaned_data(db: DuckDBClient, cleaned: dict[int, DataFrame]) -> list[ValidationReport]:
+    """
+    Validates cleaned per-year data before it is written to refined.data_{year}.
+
+    Each DataFrame is registered as cleaned_data_{year} and checked inside DuckDB,
+    so a failing check leaves the stored tables untouched.
+
+    Arguments:
+        db: An instance of the Database class to interact with the database.
+        cleaned: The cleaned data of each year.
+
+    Returns:
+        The validation reports (when no error-severity check failed).
+    """
+    reports = []
+    for year, data in cleaned.items():
+        view = f'cleaned_data_{year}'
+        db.conn.register(view, data)
+        try:
+            reports.append(validate_table(db, view, default_checks(year)))
+        finally:
+            db.conn.unregister(view)
+    return _raise_on_errors(reports)
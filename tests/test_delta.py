@@ -0,0 +1,51 @@
+import pytest
+
+from datathon.database.client import DuckDBClient
+from datathon.database.delta import upsert_table, write_table
+
+
+@pytest.fixture
+def db():
+    with DuckDBClient(':memory:') as client:
+        client.conn.execute("CREATE SCHEMA s;")
+        yield client
+
+
+def rows(db: DuckDBClient, table: str) -> list[tuple]:
+    return sorted(db.conn.execute(f"SELECT * FROM {table};").fetchall())
+
+
+def test_upsert_replaces_when_old_table_lacks_a_key_column(db):
+    db.conn.execute("CREATE TABLE s.students AS SELECT * FROM (VALUES ('a', 1)) v(ra, x);")
+    source = "SELECT * FROM (VALUES ('a', 2022, 1), ('b', 2022, 2)) v(ra, year, x)"
+
+    changes = upsert_table(db, 's.students', source, keys=['ra', 'year'])
+
+    assert rows(db, 's.students') == [('a', 2022, 1), ('b', 2022, 2)]
+    assert len(changes.inserted) == 2
+    assert changes.updated.empty and changes.deleted.empty
+
+
+def test_upsert_keeps_rows_with_duplicate_keys_like_replace(db):
+    db.conn.execute("CREATE TABLE s.t AS SELECT * FROM (VALUES ('a', 1), ('a', 2)) v(k, x);")
+    db.conn.execute("CREATE TABLE s.r AS SELECT * FROM s.t;")
+    source = "SELECT * FROM (VALUES ('a', 1), ('a', 3)) v(k, x)"
+
+    upsert_table(db, 's.t', source, keys=['k'])
+    write_table(db, 's.r', source, keys=['k'], mode='replace')
+
+    assert rows(db, 's.t') == rows(db, 's.r') == [('a', 1), ('a', 3)]
+
+
+def test_upsert_keeps_the_table_sorted(db):
+    db.conn.execute("""
+        CREATE TABLE s.history AS
+        SELECT * FROM (VALUES ('RA-1', 2023, 1), ('RA-2', 2023, 1), ('RA-1', 2024, 1)) v(ra, year, x);
+    """)
+    source = "SELECT * FROM (VALUES ('RA-1', 2023, 5), ('RA-2', 2023, 1), ('RA-1', 2024, 1)) v(ra, year, x)"
+
+    upsert_table(db, 's.history', source, keys=['ra', 'year'], order_by=['year', 'ra'])
+
+    assert db.conn.execute("SELECT ra, year, x FROM s.history;").fetchall() == [
+        ('RA-1', 2023, 5), ('RA-2', 2023, 1), ('RA-1', 2024, 1),
+    ]